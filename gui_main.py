@@ -31,6 +31,7 @@ class AudioToolGUI:
         self.json_dir = tk.StringVar()
         self.wem_dir = tk.StringVar()
         self.output_dir = tk.StringVar()
+        self.use_hardlink = tk.BooleanVar(value=False)
         self.operation_buttons = {}  # Store operation buttons for color updating
 
         self.add_logo("UntilDawnLogo.png")
@@ -151,6 +152,11 @@ class AudioToolGUI:
             self.output_picker = self.create_folder_picker("Output Folder", self.output_dir, "Select the folder to save output")
             self.wem_picker.pack(pady=10)
             self.output_picker.pack(pady=10)
+            self.hardlink_check = tk.Checkbutton(self.picker_frame, text="Hard link output files instead of copying (same drive only)",
+                                                 variable=self.use_hardlink, bg=THEME["bg"], fg=THEME["fg"], selectcolor=THEME["entry_bg"],
+                                                 activebackground=THEME["bg"], activeforeground=THEME["fg"])
+            self.create_tooltip(self.hardlink_check, "Instant and uses no extra disk space, but a linked output IS the source file:\nediting or overwriting one changes the other.")
+            self.hardlink_check.pack(pady=5)
 
     def create_folder_picker(self, label_text, var, tooltip_text):
         outer = tk.Frame(self.picker_frame, bg=THEME["bg"])
@@ -188,13 +194,13 @@ class AudioToolGUI:
                     messagebox.showerror("Missing Input", "Please select both WEM and output directories.")
                     return
                 logging.info("🔓 Unobfuscating WEM files...")
-                unobfuscate_from_mapping(self.wem_dir.get(), self.output_dir.get())
+                unobfuscate_from_mapping(self.wem_dir.get(), self.output_dir.get(), use_hardlink=self.use_hardlink.get())
             elif mode == "obfuscate":
                 if not self.wem_dir.get() or not self.output_dir.get():
                     messagebox.showerror("Missing Input", "Please select both WEM and output directories.")
                     return
                 logging.info("🔒 Obfuscating WEM files...")
-                obfuscate_from_mapping(self.wem_dir.get(), self.output_dir.get())
+                obfuscate_from_mapping(self.wem_dir.get(), self.output_dir.get(), use_hardlink=self.use_hardlink.get())
             else:
                 messagebox.showwarning("No Operation", "Please select an operation first.")
                 return
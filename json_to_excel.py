@@ -1,11 +1,15 @@
 import json
-import pandas as pd
 import os
 import logging
 from collections import defaultdict
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment
 from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.dimensions import ColumnDimension # Import ColumnDimension
+from utils import load_json_file
+
+# Sheets with more rows than this are split into numbered parts to keep them quick to write and open
+MAX_ROWS_PER_SHEET = 250_000
 
 def format_file_size(size_in_bytes):
     """Converts bytes to a human-readable format (KB, MB, GB)."""
@@ -22,14 +26,93 @@ def format_file_size(size_in_bytes):
         return f"{size_in_bytes / (1024 * 1024 * 1024):.2f} GB"
 
 
+def split_oversized_sheets(sheets, max_rows=MAX_ROWS_PER_SHEET):
+    """
+    Splits any sheet with more than max_rows rows into numbered segments,
+    keeping the segmented names within Excel's 31 character limit.
+    """
+    segmented_sheets = {}
+    for sheet_name, (headers, rows) in sheets.items():
+        if len(rows) <= max_rows:
+            segmented_sheets[sheet_name] = (headers, rows)
+            continue
+        for segment_index, start in enumerate(range(0, len(rows), max_rows), start=1):
+            suffix = f"_{segment_index}"
+            segment_name = f"{sheet_name[:31 - len(suffix)]}{suffix}"
+            segmented_sheets[segment_name] = (headers, rows[start:start + max_rows])
+        logging.info(f"  - Split sheet '{sheet_name}' ({len(rows)} rows) into {segment_index} sheets of up to {max_rows} rows")
+    return segmented_sheets
+
+
+def write_sheets_to_excel(excel_path, sheets):
+    """
+    Writes {sheet_name: (headers, rows)} to an Excel (.xlsx) file using openpyxl's write-only mode,
+    so rows are streamed to disk instead of building the whole workbook in memory.
+    Column widths are shared across sheets, data cells get wrap text and middle vertical alignment,
+    the header row and column A are frozen, and filters are added to the header row.
+    Row heights are left unset (there is no per-row auto-size in write-only mode), so Excel sizes
+    rows with wrapped text itself.
+    Sheets longer than MAX_ROWS_PER_SHEET are split into numbered parts ('Name_1', 'Name_2', ...).
+
+    Args:
+        excel_path (str): The path for the output Excel file.
+        sheets (dict): Sheet name -> (list of header strings, list of row value lists).
+    """
+    sheets = split_oversized_sheets(sheets)
+
+    # Write-only sheets need their column widths before the first row is appended,
+    # so calculate the shared widths across all sheets up front
+    max_widths = defaultdict(int)
+    for headers, rows in sheets.values():
+        for i, header in enumerate(headers):
+            max_widths[i] = max(max_widths[i], len(str(header))) # Check header width
+        for row in rows:
+            for i, value in enumerate(row):
+                # Estimate width for wrapped text
+                max_widths[i] = max(max_widths[i], len(str(value)))
+
+    data_alignment = Alignment(wrap_text=True, vertical='center')
+    workbook = Workbook(write_only=True)
+    for sheet_name, (headers, rows) in sheets.items():
+        worksheet = workbook.create_sheet(title=sheet_name)
+
+        # Apply shared auto-size columns
+        for i in range(len(headers)):
+            column_letter = get_column_letter(i + 1) # +1 because openpyxl is 1-indexed
+            adjusted_width = (max_widths[i] + 2) * 1.2 # Add some padding
+            # Limit max width to avoid extremely wide columns
+            worksheet.column_dimensions[column_letter].width = min(adjusted_width, 100)
+
+        # Freeze the header row and column A
+        worksheet.freeze_panes = 'B2'
+
+        # Add filters to the header row
+        worksheet.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{len(rows) + 1}"
+
+        worksheet.append(headers)
+        # Apply Wrap Text and Middle Alignment to all data cells (skipping header) as they are written
+        for row in rows:
+            cells = []
+            for value in row:
+                cell = WriteOnlyCell(worksheet, value=value)
+                cell.alignment = data_alignment
+                cells.append(cell)
+            worksheet.append(cells)
+
+        logging.debug(f"  - Wrote {len(rows)} row(s) with formatting, freezing, and filters to sheet '{sheet_name}'")
+
+    workbook.save(excel_path)
+
+
 def convert_duplicates_json_to_excel(json_path="ps4_wem_analysis.json", excel_path="ps4_wem_analysis.xlsx"):
     """
     Converts the ps4_wem_analysis.json file into an Excel (.xlsx) file,
     with each category of files in a separate worksheet.
+    Reads the {"files": ..., "by_category": ...} layout, as well as older files keyed by category.
     Includes columns for Filename, Relative Path (aggregated), File Size, Duration,
     and All Categories.
     Sorts by 'Filename', applies wrap text and middle vertical alignment to all data cells,
-    auto-sizes rows and columns (shared across sheets), and freezes the header row and column A.
+    auto-sizes columns (shared across sheets), and freezes the header row and column A.
     Adds filters to the header row.
 
     Args:
@@ -44,8 +127,7 @@ def convert_duplicates_json_to_excel(json_path="ps4_wem_analysis.json", excel_pa
         return
 
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_json_file(json_path)
     except json.JSONDecodeError as e:
         logging.error(f"❌ Error decoding JSON from {json_path}: {e}")
         print(f"Error decoding JSON from {json_path}: {e}")
@@ -60,99 +142,51 @@ def convert_duplicates_json_to_excel(json_path="ps4_wem_analysis.json", excel_pa
         print("No file data found in JSON to write to Excel.")
         return
 
-    try:
-        # Use ExcelWriter to write to multiple sheets
-        with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-            all_sheets_dataframes = {} # Store DataFrames for calculating shared column widths
-
-            for category, filenames_data in data.items():
-                # Prepare data for pandas DataFrame for the current category
-                excel_data_category = []
-                for filename, file_info in filenames_data.items():
-                    # Extract paths, all_categories, size, and duration from the file_info dictionary
-                    paths = file_info.get("paths", [])
-                    all_categories = file_info.get("all_categories", [])
-                    file_size = file_info.get("size", 0) # Get size
-                    duration = file_info.get("duration", "N/A") # Get duration (will be calculated value now)
-
-                    # Convert the list of all categories to a comma-separated string for the Excel cell
-                    all_categories_str = ", ".join(all_categories)
-
-                    # Join all paths into a single string with line breaks
-                    relative_paths_str = "\n".join(paths)
-
-                    # Append a single row for this filename
-                    excel_data_category.append({
-                        "Filename": filename,
-                        "Relative Path": relative_paths_str, # Use the aggregated string
-                        "File Size": format_file_size(file_size), # Add formatted size
-                        "Duration": duration, # Add duration (calculated value)
-                        "All Categories": all_categories_str # Add the new column
-                    })
-
-                if excel_data_category:
-                    # Create a pandas DataFrame for the current category
-                    df_category = pd.DataFrame(excel_data_category)
-
-                    # Sort by 'Filename'
-                    df_category = df_category.sort_values(by="Filename", ascending=True)
-
-                    # Sanitize category name for sheet name (Excel sheet names have limits)
-                    sheet_name = category.replace(":", "_").replace("/", "_").replace("\\", "_")[:31] # Limit to 31 chars
-                    df_category.to_excel(writer, index=False, sheet_name=sheet_name)
-                    logging.info(f"  - Wrote category '{category}' to sheet '{sheet_name}' in {excel_path}")
-
-                    all_sheets_dataframes[sheet_name] = df_category # Store DataFrame
-
-            # --- Apply Formatting, Freezing, Auto-sizing, and Filters after all sheets are written ---
-            if all_sheets_dataframes:
-                # Calculate shared column widths across all sheets
-                max_widths = defaultdict(int)
-                for sheet_name, df in all_sheets_dataframes.items():
-                     # Include header row width in calculation
-                     for i, col in enumerate(df.columns):
-                         max_widths[i] = max(max_widths[i], len(str(col))) # Check header width
-                         for row_idx in range(len(df)):
-                             cell_value = str(df.iloc[row_idx, i])
-                             # Estimate width for wrapped text
-                             max_widths[i] = max(max_widths[i], len(cell_value))
-
-
-                # Apply formatting to each sheet
-                for sheet_name, df in all_sheets_dataframes.items():
-                    worksheet = writer.sheets[sheet_name]
-
-                    # Apply Wrap Text and Middle Alignment to all data cells (skipping header)
-                    for row in worksheet.iter_rows(min_row=2):
-                        for cell in row:
-                            cell.alignment = Alignment(wrap_text=True, vertical='center')
-
-                    # Auto-size rows (skipping header)
-                    for row_idx in range(2, worksheet.max_row + 1):
-                         worksheet.row_dimensions[row_idx].auto_size = True
-
-                    # Apply shared auto-size columns
-                    for i, col in enumerate(df.columns):
-                        column_letter = get_column_letter(i + 1) # +1 because openpyxl is 1-indexed
-                        adjusted_width = (max_widths[i] + 2) * 1.2 # Add some padding
-                        # Limit max width to avoid extremely wide columns
-                        if adjusted_width > 100:
-                            adjusted_width = 100
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
-
-                    # Freeze the header row and column A
-                    worksheet.freeze_panes = 'B2'
-
-                    # Add filters to the header row
-                    # Determine the range of cells for the filter
-                    filter_range = f"A1:{get_column_letter(len(df.columns))}{worksheet.max_row}"
-                    worksheet.auto_filter.ref = filter_range
-
-                    logging.debug(f"  - Applied formatting, auto-sizing, freezing, and filters in sheet '{sheet_name}'")
-
-            else:
-                 logging.info("  - No dataframes generated, skipping formatting.")
+    if "files" in data and "by_category" in data:
+        files = data["files"]
+        filenames_by_category = data["by_category"]
+    else:
+        # Older analysis files repeat each file's info under every category it appears in
+        files = {}
+        for filenames_data in data.values():
+            files.update(filenames_data)
+        filenames_by_category = {category: list(filenames_data) for category, filenames_data in data.items()}
+
+    headers = ["Filename", "Relative Path", "File Size", "Duration", "All Categories"]
+    sheets = {}
+    for category, filenames in filenames_by_category.items():
+        # Prepare rows for the current category
+        rows = []
+        # Sort by 'Filename'
+        for filename in sorted(filenames):
+            file_info = files.get(filename, {})
+            # Extract paths, all_categories, size, and duration from the file_info dictionary
+            paths = file_info.get("paths", [])
+            all_categories = file_info.get("all_categories", [])
+            file_size = file_info.get("size", 0) # Get size
+            duration = file_info.get("duration", "N/A") # Get duration (will be calculated value now)
+
+            # Append a single row for this filename
+            rows.append([
+                filename,
+                "\n".join(paths), # Join all paths into a single string with line breaks
+                format_file_size(file_size), # Add formatted size
+                duration, # Add duration (calculated value)
+                ", ".join(all_categories) # Comma-separated list of all categories
+            ])
+
+        if rows:
+            # Sanitize category name for sheet name (Excel sheet names have limits)
+            sheet_name = category.replace(":", "_").replace("/", "_").replace("\\", "_")[:31] # Limit to 31 chars
+            sheets[sheet_name] = (headers, rows)
+            logging.info(f"  - Added category '{category}' as sheet '{sheet_name}' in {excel_path}")
+
+    if not sheets:
+        logging.info("  - No rows generated, skipping Excel output.")
+        return
 
+    try:
+        write_sheets_to_excel(excel_path, sheets)
 
         logging.info(f"✅ Successfully converted {json_path} to {excel_path} with categories as sheets.")
         print(f"Successfully converted {json_path} to {excel_path} with categories as sheets.")
@@ -173,7 +207,7 @@ def convert_mapping_json_to_excel(json_path="wem_mapping.json", excel_path="wem_
     Includes MediaPathName, DebugName, all Source JSONs (with line breaks),
     File Size, Duration, and a list of sheets the entry appears on.
     Sorts by 'DebugName', applies wrap text and middle vertical alignment to all data cells,
-    auto-sizes rows and columns (shared across sheets), and freezes the header row and column A.
+    auto-sizes columns (shared across sheets), and freezes the header row and column A.
     Adds filters to the header row.
     Calculates duration by converting WEM to OGG if pc_wem_dir is provided.
 
@@ -196,8 +230,7 @@ def convert_mapping_json_to_excel(json_path="wem_mapping.json", excel_path="wem_
         # Proceed without file size/duration if directory is missing
 
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_json_file(json_path)
     except json.JSONDecodeError as e:
         logging.error(f"❌ Error decoding JSON from {json_path}: {e}")
         print(f"Error decoding JSON from {json_path}: {e}")
@@ -234,7 +267,7 @@ def convert_mapping_json_to_excel(json_path="wem_mapping.json", excel_path="wem_
                  wem_files_to_process.append(full_wem_path)
                  media_path_to_full_path[media_path] = full_wem_path
              else:
-                 logging.debug(f"  - PC WEM file not found for mapping entry: {full_wem_path}")
+                 logging.debug("  - PC WEM file not found for mapping entry: %s", full_wem_path)
 
     file_info_results = {} # Store results {media_path: {"size": size, "duration": duration_string}}
 
@@ -257,7 +290,7 @@ def convert_mapping_json_to_excel(json_path="wem_mapping.json", excel_path="wem_
                     if original_media_path:
                          file_size = os.path.getsize(wem_path) # Get size after confirming file exists
                          file_info_results[original_media_path] = {"size": file_size, "duration": duration}
-                         logging.debug(f"Processed PC WEM {os.path.basename(wem_path)}: Size {file_size}, Duration {duration}")
+                         logging.debug("Processed PC WEM %s: Size %s, Duration %s", wem_path, file_size, duration)
                     else:
                          logging.warning(f"⚠️ Could not map processed WEM path back to original media_path: {wem_path}")
 
@@ -322,80 +355,26 @@ def convert_mapping_json_to_excel(json_path="wem_mapping.json", excel_path="wem_
                 "Group": appears_on_sheets_str # Renamed column to "Group"
             }
 
-    try:
-        # Use ExcelWriter to write to multiple sheets
-        with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-            all_sheets_dataframes = {} # Store DataFrames for calculating shared column widths
-
-            # Sort sheet names alphabetically and process each group
-            for sheet_name in sorted(grouped_data_aggregated.keys()):
-                # Convert the dictionary of unique rows into a list of dictionaries for the DataFrame
-                excel_data_sheet = list(grouped_data_aggregated[sheet_name].values())
-
-                if excel_data_sheet:
-                    df_sheet = pd.DataFrame(excel_data_sheet)
-
-                    # Sort by 'DebugName'
-                    df_sheet = df_sheet.sort_values(by="DebugName", ascending=True)
-
-                    # Sanitize sheet name (for actual Excel sheet name)
-                    sanitized_sheet_name = sheet_name.replace(":", "_").replace("/", "_").replace("\\", "_")[:31] # Limit to 31 chars
-                    df_sheet.to_excel(writer, index=False, sheet_name=sanitized_sheet_name)
-                    logging.info(f"  - Wrote data for source folder '{sheet_name}' to sheet '{sanitized_sheet_name}' in {excel_path}")
-
-                    all_sheets_dataframes[sanitized_sheet_name] = df_sheet # Store DataFrame using sanitized name
-
-            # --- Apply Formatting, Freezing, Auto-sizing, and Filters after all sheets are written ---
-            if all_sheets_dataframes:
-                # Calculate shared column widths across all sheets
-                max_widths = defaultdict(int)
-                # Iterate through the stored dataframes to find max widths
-                for sheet_name, df in all_sheets_dataframes.items():
-                     # Include header row width in calculation
-                     for i, col in enumerate(df.columns):
-                         max_widths[i] = max(max_widths[i], len(str(col))) # Check header width
-                         for row_idx in range(len(df)):
-                             cell_value = str(df.iloc[row_idx, i])
-                             # Estimate width for wrapped text
-                             max_widths[i] = max(max_widths[i], len(cell_value))
-
-
-                # Apply formatting to each sheet
-                for sheet_name, df in all_sheets_dataframes.items():
-                    worksheet = writer.sheets[sheet_name]
-
-                    # Apply Wrap Text and Middle Alignment to all data cells (skipping header)
-                    for row in worksheet.iter_rows(min_row=2):
-                        for cell in row:
-                            cell.alignment = Alignment(wrap_text=True, vertical='center')
-
-                    # Auto-size rows (skipping header)
-                    for row_idx in range(2, worksheet.max_row + 1):
-                         worksheet.row_dimensions[row_idx].auto_size = True
-
-                    # Apply shared auto-size columns
-                    for i, col in enumerate(df.columns):
-                        column_letter = get_column_letter(i + 1) # +1 because openpyxl is 1-indexed
-                        adjusted_width = (max_widths[i] + 2) * 1.2 # Add some padding
-                        # Limit max width to avoid extremely wide columns
-                        if adjusted_width > 100:
-                            adjusted_width = 100
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
-
-                    # Freeze the header row and column A
-                    worksheet.freeze_panes = 'B2'
-
-                    # Add filters to the header row
-                    # Determine the range of cells for the filter
-                    filter_range = f"A1:{get_column_letter(len(df.columns))}{worksheet.max_row}"
-                    worksheet.auto_filter.ref = filter_range
-
-                    logging.debug(f"  - Applied formatting, auto-sizing, freezing, and filters in sheet '{sanitized_sheet_name}'")
-
-
-            else:
-                 logging.info("  - No dataframes generated, skipping formatting.")
+    headers = ["MediaPathName (Wwise ID)", "DebugName", "Source JSON File", "File Size", "Duration", "Group"]
+    sheets = {}
+    # Sort sheet names alphabetically and process each group
+    for sheet_name in sorted(grouped_data_aggregated.keys()):
+        # Convert the dictionary of unique rows into row lists, sorted by 'DebugName'
+        row_dicts = sorted(grouped_data_aggregated[sheet_name].values(), key=lambda row: row["DebugName"])
+        rows = [[row[header] for header in headers] for row in row_dicts]
+
+        if rows:
+            # Sanitize sheet name (for actual Excel sheet name)
+            sanitized_sheet_name = sheet_name.replace(":", "_").replace("/", "_").replace("\\", "_")[:31] # Limit to 31 chars
+            sheets[sanitized_sheet_name] = (headers, rows)
+            logging.info(f"  - Added data for source folder '{sheet_name}' as sheet '{sanitized_sheet_name}' in {excel_path}")
+
+    if not sheets:
+        logging.info("  - No rows generated, skipping Excel output.")
+        return
 
+    try:
+        write_sheets_to_excel(excel_path, sheets)
 
         logging.info(f"✅ Successfully converted {json_path} to {excel_path} with source folders as sheets.")
         print(f"Successfully converted {json_path} to {excel_path} with source folders as sheets.")
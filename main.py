@@ -1,9 +1,15 @@
 import logging
 import os
 from utils import select_directory, configure_logger
-from processing import generate_mapping_from_json, unobfuscate_from_mapping, obfuscate_from_mapping, list_ps4_wem_files, find_ps4_wem_duplicates
+from processing import generate_mapping_from_json, unobfuscate_from_mapping, obfuscate_from_mapping, find_ps4_wem_duplicates
 from json_to_excel import convert_duplicates_json_to_excel # Import the conversion function
 
+def ask_use_hardlink():
+    """Asks whether outputs may be hard links to the source files instead of copies (default: copy)."""
+    print("   Hard links are instant and use no extra disk space when the output folder is on the same drive,")
+    print("   but a linked output IS the source file: editing or overwriting one changes the other.")
+    return input("   Hard link the output files instead of copying them? (y/N): ").strip().lower() in ("y", "yes")
+
 def main():
     # Configure logger at the start
     configure_logger()
@@ -39,7 +45,7 @@ def main():
                 output_dir = select_directory(title="Select Output Directory for Unobfuscated PC WEMs")
                 if not output_dir:
                     continue
-                unobfuscate_from_mapping(wem_dir, output_dir)
+                unobfuscate_from_mapping(wem_dir, output_dir, use_hardlink=ask_use_hardlink())
             elif choice == "3":
                 # Ensure INFO logging for renaming
                 logging.getLogger().setLevel(logging.INFO)
@@ -49,14 +55,13 @@ def main():
                 output_dir = select_directory(title="Select Output Directory for Obfuscated PC WEMs")
                 if not output_dir:
                     continue
-                obfuscate_from_mapping(wem_dir, output_dir)
+                obfuscate_from_mapping(wem_dir, output_dir, use_hardlink=ask_use_hardlink())
             elif choice == "4":
                 # Set logging level to DEBUG for detailed PS4 analysis output
                 logging.getLogger().setLevel(logging.DEBUG)
                 ps4_wem_dir = select_directory(title="Select the root directory of PS4 WEM files for analysis")
                 if ps4_wem_dir:
-                    list_ps4_wem_files(ps4_wem_dir) # Call the function to list files
-                    find_ps4_wem_duplicates(ps4_wem_dir) # Call the function to find duplicates (saves JSON)
+                    find_ps4_wem_duplicates(ps4_wem_dir) # Lists all files and finds duplicates in one scan (saves both JSONs)
                     # Automatically call the Excel conversion function
                     convert_duplicates_json_to_excel()
                 # Reset logging level back to INFO after PS4 analysis is done
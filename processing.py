@@ -1,12 +1,16 @@
-import json
 import os
 import logging
 import multiprocessing
+import functools
+import hashlib
+import itertools
+import typing
+from array import array
 import subprocess # Import for running external commands
 import re # Import for parsing vgmstream output
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from utils import copy_file_with_logging # Assuming utils.py exists with copy_file_with_logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from utils import copy_file_with_logging, ensure_directory, clear_directory_cache, json_loads, json_dumps, load_json_file, dump_json_file
 
 # Attempt to import mutagen (still needed for other formats if used elsewhere, but not WEM duration with vgmstream)
 try:
@@ -18,60 +22,175 @@ except ImportError:
     logging.debug("Mutagen library not found. OGG duration reading functions may not work.")
     MUTAGEN_AVAILABLE = False
 
+# Attempt to import msgspec (decodes wem_mapping.json straight into typed entries, skipping the SourceJsons lists)
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    logging.debug("msgspec library not found. wem_mapping.json will be decoded into plain dicts.")
+    MSGSPEC_AVAILABLE = False
+
+# Attempt to import ijson (streams very large Events JSON files instead of loading them whole)
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    logging.debug("ijson library not found. Events JSON files will always be loaded whole.")
+    IJSON_AVAILABLE = False
+
+if MSGSPEC_AVAILABLE:
+    class MapEntry(msgspec.Struct):
+        """A wem_mapping.json entry as the copy operations need it; SourceJsons is not decoded."""
+        DebugName: typing.Any = None
+
+    _MAPPING_DECODER = msgspec.json.Decoder(typing.Dict[str, MapEntry])
+
 
 MAX_WORKERS = multiprocessing.cpu_count() * 2
+# Copies are I/O-bound: past a handful of threads a single disk only thrashes (HDD) or gains nothing (SSD)
+COPY_WORKERS = min(multiprocessing.cpu_count(), 8)
+# vgmstream-cli runs gain little past the core count (each child is also scanned by antivirus on Windows)
+DURATION_WORKERS = min(multiprocessing.cpu_count(), 8)
+# JSON parsing is CPU-bound, so mapping generation uses one process per core (Windows allows at most 61)
+SCAN_WORKERS = min(multiprocessing.cpu_count(), 61)
 
 # Define path to external tool (assuming it's in the vgmstream-win64 subdirectory within the script folder)
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 VGMSTREAM_DIR = os.path.join(SCRIPT_DIR, "vgmstream-win64") # Define the subdirectory
 VGMSTREAM_PATH = os.path.join(VGMSTREAM_DIR, "vgmstream-cli.exe") # Adjust executable name/path if needed
 
-# More Flexible Regex to find duration in vgmstream output
-# This looks for "play duration:", any characters non-greedily, then captures time within parentheses (MM:SS.ms or H:MM:SS.ms) followed by " seconds)"
-# Using \s+ to match one or more whitespace characters, and allowing any characters (.*?) before the time.
-DURATION_REGEX = re.compile(r"play duration:.*?\((\d+:\d{2}(:\d{2})?\.\d{3})\s*seconds\)")
+# Output files, written next to the scripts
+MAP_PATH = os.path.join(SCRIPT_DIR, "wem_mapping.json")
+MAP_PAIRS_PATH = os.path.join(SCRIPT_DIR, "wem_mapping.jsonl") # Sidecar of (MediaPathName, DebugName) lines
+
+# Bytes reserved for the sidecar's first line, which records the (mtime_ns, size) of the wem_mapping.json it matches;
+# it is filled in once the JSON has been written, so the pairs can be streamed out before that
+MAP_PAIRS_HEADER_SIZE = 96
+ANALYSIS_PATH = os.path.join(SCRIPT_DIR, "ps4_wem_analysis.json")
+PS4_LIST_PATH = os.path.join(SCRIPT_DIR, "ps4_wem_list.json")
+
+# Events JSON files at least this big are streamed with ijson (when installed) to bound memory;
+# smaller ones parse faster in one go
+STREAM_JSON_MIN_SIZE = 32 * 1024 * 1024
+
+# generate_mapping_from_json logs progress once per this many JSON files (each file is only logged at debug level)
+SCAN_PROGRESS_INTERVAL = 100
+
+# vgmstream-cli is given many files per run to spread its process startup cost; batches stay under the
+# 32767-character Windows command line limit
+VGMSTREAM_BATCH_CHARS = 30000
+VGMSTREAM_BATCH_FILES = 64
+
+# Folder name prefixes used to categorize PS4 .wem files; anything else goes under OTHER_CATEGORY
+FOLDER_TYPES = (
+    "Act_", "Ambience_", "Foley_", "Footsteps_", "Generic_", "music_",
+    "Sequences_", "SFX_", "Choices", "Butterfly_effect_bank", "Frontend",
+    "Global_", "VFX_", "Wendigo_"
+)
+OTHER_CATEGORY = "Other"
+# One anchored, case-insensitive alternation instead of testing each prefix in Python; alternatives keep FOLDER_TYPES order
+_PREFIX_RE = re.compile("(" + "|".join(re.escape(prefix) for prefix in FOLDER_TYPES) + ")", re.IGNORECASE)
+_LOWER_TO_ORIG = {prefix.lower(): prefix for prefix in FOLDER_TYPES}
+
+# Regex to find duration in vgmstream output
+# The "play duration:" line is located with bytes.find, and this is only run over that one line:
+# it captures the time within parentheses (MM:SS.ms or H:MM:SS.ms) followed by " seconds)"
+# Both are bytes patterns: vgmstream-cli output is matched undecoded and only the captured time is decoded.
+PLAY_DURATION_MARKER = b"play duration:"
+DURATION_REGEX = re.compile(rb"\((\d+:\d{2}(?::\d{2})?\.\d{3})\s*seconds\)")
 # Keeping the alternative regex just in case.
-ALT_DURATION_REGEX = re.compile(r"total samples:\s*\d+\s*\((\d+:\d{2}:\d{2}\.\d{3})\)")
+ALT_DURATION_REGEX = re.compile(rb"total samples:\s*\d+\s*\((\d+:\d{2}:\d{2}\.\d{3})\)")
 
 
-def run_command(command, cwd=None):
-    """Helper function to run an external command and capture output/errors."""
+def _iter_file_entries(root, suffix):
+    """
+    Yields the os.DirEntry of every file below root whose name ends with suffix (case-insensitive).
+    Walks with os.scandir and an explicit stack, so the file type from each directory read is
+    reused and names are filtered before any further filesystem calls (unlike os.walk).
+    DirEntry.stat() is cached, and on Windows comes straight from the directory read.
+    Files are yielded in the same top-down order as os.walk (a directory's files, then each
+    subdirectory in turn), since the last file seen wins DebugName conflicts.
+    Like os.walk, symlinked directories are not followed.
+    """
+    pending_dirs = [root]
+    while pending_dirs:
+        subdirs = []
+        try:
+            with os.scandir(pending_dirs.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.lower().endswith(suffix) and entry.is_file():
+                        yield entry
+        except OSError as e:
+            logging.warning(f"⚠️ Could not scan directory: {e}")
+        # Reversed so the stack pops subdirectories in directory-listing order
+        pending_dirs.extend(reversed(subdirs))
+
+def _iter_files(root, suffix):
+    """Yields (path, name) for every file below root whose name ends with suffix (case-insensitive)."""
+    for entry in _iter_file_entries(root, suffix):
+        yield entry.path, entry.name
+
+
+def run_command(command, cwd=None, failure_level=logging.ERROR):
+    """
+    Helper function to run an external command and capture output/errors. Returns stdout as undecoded bytes.
+    Failures are logged at failure_level (lower it when the caller retries and reports errors itself).
+    """
     try:
         result = subprocess.run(
             command,
             cwd=cwd,
             capture_output=True,
-            text=True,
             check=True # Raise CalledProcessError if command returns non-zero exit code
         )
-        logging.debug(f"Command successful: {' '.join(command)}")
-        if result.stdout:
-            logging.debug(f"Stdout: {result.stdout.strip()}")
-        if result.stderr:
-            logging.debug(f"Stderr: {result.stderr.strip()}")
+        # Guarded so the command/output strings aren't joined and stripped per file when debug logging is off
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Command successful: %s", ' '.join(command))
+            if result.stdout:
+                logging.debug("Stdout: %s", result.stdout.decode(errors="replace").strip())
+            if result.stderr:
+                logging.debug("Stderr: %s", result.stderr.decode(errors="replace").strip())
         return result.stdout # Return full stdout for parsing
     except FileNotFoundError:
-        logging.error(f"❌ Error: Command not found. Make sure '{command[0]}' is in your PATH or script directory.")
+        logging.log(failure_level, f"❌ Error: Command not found. Make sure '{command[0]}' is in your PATH or script directory.")
         return None
     except subprocess.CalledProcessError as e:
-        logging.error(f"❌ Error running command: {' '.join(command)}")
-        logging.error(f"Return code: {e.returncode}")
+        logging.log(failure_level, f"❌ Error running command: {' '.join(command)}")
+        logging.log(failure_level, f"Return code: {e.returncode}")
         if e.stdout:
-             logging.error(f"Stdout: {e.stdout.strip()}")
+             logging.log(failure_level, f"Stdout: {e.stdout.decode(errors='replace').strip()}")
         if e.stderr:
-             logging.error(f"Stderr: {e.stderr.strip()}")
+             logging.log(failure_level, f"Stderr: {e.stderr.decode(errors='replace').strip()}")
         return None # Return None to indicate failure
     except Exception as e:
-        logging.error(f"❌ An unexpected error occurred while running command {' '.join(command)}: {e}")
+        logging.log(failure_level, f"❌ An unexpected error occurred while running command {' '.join(command)}: {e}")
         return None # Return None to indicate failure
 
 
+def _parse_play_durations(vgmstream_output):
+    """
+    Returns the time from every "play duration:" line of vgmstream-cli output, in order
+    (None for a line whose time can't be read). The regex only ever sees one line.
+    """
+    durations = []
+    line_start = vgmstream_output.find(PLAY_DURATION_MARKER)
+    while line_start >= 0:
+        line_end = vgmstream_output.find(b"\n", line_start)
+        if line_end < 0:
+            line_end = len(vgmstream_output)
+        match = DURATION_REGEX.search(vgmstream_output, line_start, line_end)
+        durations.append(match.group(1).decode("ascii") if match else None)
+        line_start = vgmstream_output.find(PLAY_DURATION_MARKER, line_end)
+    return durations
+
 def get_wem_duration_vgmstream(wem_file_path):
     """
     Gets the duration of a WEM file using vgmstream-cli.
     Returns duration string (MM:SS.ms or H:MM:SS.ms) or "N/A" if failed.
     """
-    logging.debug(f"Attempting to get duration for: {wem_file_path}") # Added debug log
+    logging.debug("Attempting to get duration for: %s", wem_file_path)
     if not os.path.exists(VGMSTREAM_PATH):
         logging.error("❌ vgmstream-cli not found at expected location.") # Changed to error
         return "N/A (vgmstream-cli not found at expected location)"
@@ -82,28 +201,28 @@ def get_wem_duration_vgmstream(wem_file_path):
     duration = "N/A (Failed to parse)"
 
     try:
-        # Run vgmstream-cli with the info flag (-i)
-        # The output contains metadata including duration
-        vgmstream_command = [VGMSTREAM_PATH, "-i", wem_file_path]
-        logging.debug(f"Running vgmstream-cli command: {' '.join(vgmstream_command)}") # Added debug log
+        # Run vgmstream-cli in metadata-only mode (-m), ignoring loops (-i)
+        # The output contains metadata including duration, and no audio is decoded or written
+        vgmstream_command = [VGMSTREAM_PATH, "-m", "-i", wem_file_path]
+        logging.debug("Running vgmstream-cli command: %s", vgmstream_command)
         vgmstream_output = run_command(vgmstream_command)
-        logging.debug(f"vgmstream-cli command finished for: {wem_file_path}") # Added debug log
+        logging.debug("vgmstream-cli command finished for: %s", wem_file_path)
 
 
         if vgmstream_output is not None:
             # Parse the output to find the duration line
-            match = DURATION_REGEX.search(vgmstream_output)
-            if match:
-                duration = match.group(1)
-                logging.debug(f"Successfully parsed duration for {os.path.basename(wem_file_path)}: {duration}") # Added debug log
+            durations = _parse_play_durations(vgmstream_output)
+            if durations and durations[0]:
+                duration = durations[0]
+                logging.debug("Successfully parsed duration for %s: %s", wem_file_path, duration)
             else:
                 # Try the alternative regex if the first one fails
                 alt_match = ALT_DURATION_REGEX.search(vgmstream_output)
                 if alt_match:
-                    duration = alt_match.group(1)
-                    logging.debug(f"Successfully parsed duration (alt regex) for {os.path.basename(wem_file_path)}: {duration}") # Added debug log
+                    duration = alt_match.group(1).decode("ascii")
+                    logging.debug("Successfully parsed duration (alt regex) for %s: %s", wem_file_path, duration)
                 else:
-                    logging.warning(f"⚠️ Could not find duration in vgmstream-cli output for {os.path.basename(wem_file_path)}. Please check the regex patterns in processing.py. Output segment:\n{vgmstream_output[:500]}...") # Log partial output
+                    logging.warning(f"⚠️ Could not find duration in vgmstream-cli output for {os.path.basename(wem_file_path)}. Please check the regex patterns in processing.py. Output segment:\n{vgmstream_output[:500].decode(errors='replace')}...") # Log partial output
                     duration = "N/A (Duration pattern not matched)"
         else:
             duration = "N/A (vgmstream-cli failed)"
@@ -115,14 +234,119 @@ def get_wem_duration_vgmstream(wem_file_path):
     return duration
 
 
+def _batch_wem_paths(wem_file_paths, batch_files):
+    """Splits paths into vgmstream-cli batches of at most batch_files files and VGMSTREAM_BATCH_CHARS command line characters."""
+    base_chars = len(VGMSTREAM_PATH) + 9 # Executable, flags and quoting
+    batch, batch_chars = [], base_chars
+    for wem_file_path in wem_file_paths:
+        path_chars = len(wem_file_path) + 3 # Quotes and separating space
+        if batch and (len(batch) >= batch_files or batch_chars + path_chars > VGMSTREAM_BATCH_CHARS):
+            yield batch
+            batch, batch_chars = [], base_chars
+        batch.append(wem_file_path)
+        batch_chars += path_chars
+    if batch:
+        yield batch
+
+def get_wem_durations_vgmstream(wem_file_paths):
+    """
+    Gets the durations of several WEM files from a single vgmstream-cli run.
+    Returns {path: duration string}. Falls back to one get_wem_duration_vgmstream call per file
+    if the run fails or its output doesn't hold exactly one duration per file.
+    """
+    if len(wem_file_paths) > 1:
+        # Quiet on failure: one bad file fails the whole batch, and the per-file retry below reports real errors
+        vgmstream_output = run_command([VGMSTREAM_PATH, "-m", "-i", *wem_file_paths], failure_level=logging.DEBUG)
+        if vgmstream_output is not None:
+            # vgmstream-cli reports the files in argument order, one "play duration" line each
+            durations = _parse_play_durations(vgmstream_output)
+            if len(durations) == len(wem_file_paths) and all(durations):
+                return dict(zip(wem_file_paths, durations))
+        logging.debug("vgmstream-cli batch of %d files failed or was ambiguous, retrying per file", len(wem_file_paths))
+    return {wem_file_path: get_wem_duration_vgmstream(wem_file_path) for wem_file_path in wem_file_paths}
+
+def _wem_fingerprint(wem_file_path):
+    """Returns (size, hash of the first 64 KiB) to spot byte-identical WEM files, or None if the file can't be read."""
+    try:
+        with open(wem_file_path, "rb") as f:
+            return os.fstat(f.fileno()).st_size, hashlib.blake2b(f.read(65536), digest_size=16).digest()
+    except OSError:
+        return None
+
+
+def extract_media_pairs(data):
+    """
+    Extracts (MediaPathName, DebugName) pairs from one parsed PC Events JSON file.
+    Kept as a flat loop over plain lists/dicts with locals bound up front, since this
+    walk (event -> language map -> media) is the hot path of mapping generation.
+    """
+    pairs = []
+    append = pairs.append
+    for event in data:
+        # The Wwise schema is fixed, so index straight down and skip the rare event without it;
+        # TypeError covers non-object entries, which the ijson path skips as well
+        try:
+            lang_maps = event["EventCookedData"]["EventLanguageMap"]
+        except (KeyError, TypeError):
+            continue
+        for lang_map in lang_maps:
+            try:
+                media_list = lang_map["Value"]["Media"]
+            except (KeyError, TypeError):
+                continue
+            for media in media_list:
+                # Both keys are present on almost every entry, so subscript and skip the rare miss
+                try:
+                    media_path = media["MediaPathName"]
+                    debug_name = media["DebugName"]
+                except KeyError:
+                    continue
+                if media_path and debug_name:
+                    append((media_path, debug_name))
+    return pairs
+
+def stream_media_pairs(json_path):
+    """
+    Like extract_media_pairs, but streams the file with ijson so only one media entry
+    is materialized at a time instead of the whole event tree.
+    """
+    pairs = []
+    append = pairs.append
+    with open(json_path, "rb") as f:
+        for media in ijson.items(f, "item.EventCookedData.EventLanguageMap.item.Value.Media.item"):
+            try:
+                media_path = media["MediaPathName"]
+                debug_name = media["DebugName"]
+            except KeyError:
+                continue
+            if media_path and debug_name:
+                append((media_path, debug_name))
+    return pairs
+
+def _scan_json_file(json_path, json_dir):
+    """
+    Worker for generate_mapping_from_json, run in a separate process: parses one Events JSON file.
+    Returns (relative JSON path, list of (MediaPathName, DebugName) pairs, error message or None).
+    """
+    # Relative path for the source JSON, with separators normalized for consistency
+    relative_json_path = os.path.relpath(json_path, json_dir).replace("\\", "/")
+    try:
+        if IJSON_AVAILABLE and os.path.getsize(json_path) >= STREAM_JSON_MIN_SIZE:
+            return relative_json_path, stream_media_pairs(json_path), None
+        return relative_json_path, extract_media_pairs(load_json_file(json_path)), None
+    except Exception as e:
+        return relative_json_path, [], str(e)
+
 def generate_mapping_from_json(json_dir, specific_folder=None):
     """
     Generates a mapping from PC version JSON files to Wwise IDs and DebugNames,
     including the source JSON files (relative paths to the input json_dir) for each mapping.
     This is specifically for the PC version's obfuscated files.
     """
-    mapping = {} # Structure will be {MediaPathName: {"DebugName": "...", "SourceJsons": [...]}}
-    total_files = 0
+    # Two flat dicts instead of a small dict per entry; the {MediaPathName: {"DebugName": ..., "SourceJsons": [...]}}
+    # structure is only built when writing wem_mapping.json
+    debug_name_by_path = {}
+    sources_by_path = {}
     logging.info(f"Starting PC mapping generation from JSON directory: {json_dir}")
 
     # The base path for relative paths will be the input json_dir
@@ -132,81 +356,184 @@ def generate_mapping_from_json(json_dir, specific_folder=None):
         base_path_for_relative += os.sep
 
 
-    for root, _, files in os.walk(json_dir):
-        if specific_folder is None or os.path.basename(root) == specific_folder or specific_folder in root:
-            for filename in files:
-                if filename.endswith(".json"):
-                    json_path = os.path.join(root, filename)
-                    logging.info(f"📄 Scanning: {json_path}")
-                    total_files += 1
-                    try:
-                        with open(json_path, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-
-                        # Calculate the relative path for the source JSON using os.path.relpath
-                        relative_json_path = os.path.relpath(json_path, json_dir)
-                        # Normalize separators for consistency
-                        relative_json_path = relative_json_path.replace("\\", "/")
-
-
-                        for event in data:
-                            if "EventCookedData" in event and "EventLanguageMap" in event["EventCookedData"]:
-                                for lang_map in event["EventCookedData"]["EventLanguageMap"]:
-                                    if "Value" in lang_map and "Media" in lang_map["Value"]:
-                                        for media in lang_map["Value"]["Media"]:
-                                            media_path = media.get("MediaPathName")
-                                            debug_name = media.get("DebugName")
-                                            if media_path and debug_name:
-                                                if media_path not in mapping:
-                                                    # New MediaPathName, create entry
-                                                    mapping[media_path] = {
-                                                        "DebugName": debug_name,
-                                                        "SourceJsons": [relative_json_path] # Store relative path
-                                                    }
-                                                    logging.debug(f"  - New mapping for {media_path}: {debug_name} from {relative_json_path}")
-                                                else:
-                                                    # Existing MediaPathName
-                                                    # Add the current relative JSON path to the list if not already present
-                                                    if relative_json_path not in mapping[media_path]["SourceJsons"]:
-                                                         mapping[media_path]["SourceJsons"].append(relative_json_path)
-
-                                                    # Check for conflicting DebugNames
-                                                    if mapping[media_path]["DebugName"] != debug_name:
-                                                        logging.warning(f"⚠️ Conflicting DebugName for {media_path}: Found '{debug_name}' in {relative_json_path}, already mapped as '{mapping[media_path]['DebugName']}'")
-                                                        # Keep the latest DebugName found (or could choose first, or list them)
-                                                        mapping[media_path]["DebugName"] = debug_name
-                                                    logging.debug(f"  - Updated mapping for {media_path}: added {relative_json_path}")
-
-                    except Exception as e:
-                        logging.error(f"❌ Failed to process {json_path}: {e}")
-
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    map_path = os.path.join(script_dir, "wem_mapping.json")
-
-    # Write the mapping to a JSON file with sorted keys
-    with open(map_path, "w", encoding="utf-8") as f:
-        # Sort the source JSON lists within each entry for consistent output
-        sorted_mapping = {}
-        for media_path, data in sorted(mapping.items()):
-             data["SourceJsons"] = sorted(data["SourceJsons"])
-             sorted_mapping[media_path] = data
-
-        json.dump(sorted_mapping, f, indent=2)
+    # Match specific_folder as a whole path component below json_dir (not as a substring of the full path)
+    folder_needle = f"{os.sep}{specific_folder}{os.sep}" if specific_folder else None
+
+    map_path = MAP_PATH
+    pairs_path = MAP_PAIRS_PATH
+
+    # Collect the JSON files first so they can be parsed in parallel
+    json_paths = [
+        json_path for json_path, _ in _iter_files(json_dir, ".json")
+        if folder_needle is None or folder_needle in f"{os.sep}{os.path.dirname(json_path)[len(json_dir):]}{os.sep}"
+    ]
+    total_files = len(json_paths)
+
+    # Stream each new or changed (MediaPathName, DebugName) pair to the JSONL sidecar as it is found;
+    # later lines override earlier ones for the same MediaPathName (see load_mapping_jsonl).
+    # It is written to a temporary file and only replaces the old sidecar once wem_mapping.json is complete,
+    # so an interrupted run never leaves a partial sidecar for the copy operations to load
+    temp_pairs_path = pairs_path + ".tmp"
+    with open(temp_pairs_path, "wb") as pairs_file, ProcessPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        pairs_file.write(b" " * (MAP_PAIRS_HEADER_SIZE - 1) + b"\n") # Header placeholder
+        # Files are parsed in worker processes but merged here in walk order, so conflict handling stays deterministic
+        # Files are handed to workers 16 at a time to cut per-task pickling and IPC round trips
+        scan_results = executor.map(_scan_json_file, json_paths, itertools.repeat(json_dir), chunksize=16)
+        # Checked once so the per-pair debug lines below cost nothing when debug logging is off
+        debug_enabled = logging.getLogger().isEnabledFor(logging.DEBUG)
+        for file_number, (json_path, (relative_json_path, media_pairs, error)) in enumerate(zip(json_paths, scan_results), 1):
+            logging.debug("📄 Scanning: %s", json_path)
+            if file_number % SCAN_PROGRESS_INTERVAL == 0:
+                logging.info(f"📄 Scanned {file_number}/{total_files} JSON file(s)...")
+            if error is not None:
+                logging.error(f"❌ Failed to process {json_path}: {error}")
+                continue
+
+            for media_path, debug_name in media_pairs:
+                source_jsons = sources_by_path.get(media_path)
+                if source_jsons is None:
+                    # New MediaPathName, create entry
+                    debug_name_by_path[media_path] = debug_name
+                    sources_by_path[media_path] = {relative_json_path} # Store relative path; a set keeps inserts O(1), sorted on write
+                    pairs_file.write(json_dumps([media_path, debug_name]) + b"\n")
+                    if debug_enabled:
+                        logging.debug("  - New mapping for %s: %s from %s", media_path, debug_name, relative_json_path)
+                else:
+                    # Existing MediaPathName
+                    # Add the current relative JSON path (the set ignores repeats)
+                    source_jsons.add(relative_json_path)
+
+                    # Check for conflicting DebugNames
+                    mapped_debug_name = debug_name_by_path[media_path]
+                    if mapped_debug_name != debug_name:
+                        logging.warning(f"⚠️ Conflicting DebugName for {media_path}: Found '{debug_name}' in {relative_json_path}, already mapped as '{mapped_debug_name}'")
+                        # Keep the latest DebugName found (or could choose first, or list them)
+                        debug_name_by_path[media_path] = debug_name
+                        pairs_file.write(json_dumps([media_path, debug_name]) + b"\n")
+                    if debug_enabled:
+                        logging.debug("  - Updated mapping for %s: added %s", media_path, relative_json_path)
+
+    # Write the mapping to a JSON file with sorted keys (sorted by the serializer),
+    # sorting the source JSON lists within each entry for consistent output
+    mapping = {
+        media_path: {"DebugName": debug_name, "SourceJsons": sorted(sources_by_path[media_path])}
+        for media_path, debug_name in debug_name_by_path.items()
+    }
+
+    dump_json_file(mapping, map_path, sort_keys=True)
+    # Record which wem_mapping.json the sidecar matches, then put it in place
+    map_stat = os.stat(map_path)
+    header = json_dumps({"wem_mapping.json": [map_stat.st_mtime_ns, map_stat.st_size]})
+    with open(temp_pairs_path, "r+b") as pairs_file:
+        pairs_file.write(header.ljust(MAP_PAIRS_HEADER_SIZE - 1) + b"\n")
+    os.replace(temp_pairs_path, pairs_path)
 
     logging.info(f"✅ PC mapping generated and saved to: {map_path} ({len(mapping)} entries from {total_files} file(s))")
 
-def threaded_copy_tasks(copy_tasks):
-    """Helper function to execute file copy tasks using a thread pool."""
+def load_mapping_jsonl(pairs_path):
+    """
+    Reads the wem_mapping.jsonl sidecar written by generate_mapping_from_json line by line
+    and returns {MediaPathName: DebugName}, with later lines winning for conflicting DebugNames.
+    The header line (an object rather than a pair) is skipped.
+    """
+    with open(pairs_path, "rb") as f:
+        lines = (json_loads(line) for line in f if line.strip())
+        return dict(pair for pair in lines if isinstance(pair, list))
+
+def _read_map_pairs_header(pairs_path):
+    """Returns the (mtime_ns, size) of wem_mapping.json recorded in the sidecar's header, or None if there is none."""
+    try:
+        with open(pairs_path, "rb") as f:
+            mtime_ns, size = json_loads(f.readline())["wem_mapping.json"]
+        return mtime_ns, size
+    except (OSError, ValueError, KeyError, TypeError):
+        return None # Missing sidecar, or one written without a header
+
+def _path_needs_normpath(path):
+    """True if a mapping path has components that os.path.join alone wouldn't resolve cleanly."""
+    return ".." in path or "./" in path or ".\\" in path or "//" in path or "\\\\" in path or path.startswith(("/", "\\"))
+
+@functools.lru_cache(maxsize=4)
+def _load_mapping(map_path, mtime_ns, size):
+    """
+    Loads wem_mapping.json (or its .jsonl sidecar) and returns a tuple of (MediaPathName, DebugName) pairs, plus a flag
+    telling whether any path needs os.path.normpath (FModel output normally never does).
+    Cached on (path, mtime in nanoseconds, size) so back-to-back unobfuscate/obfuscate runs don't re-parse
+    the file; regenerating the mapping changes the key and invalidates the entry, even within the same second.
+    """
+    if map_path.endswith(".jsonl"):
+        # Sidecar is in walk order; sort so duplicate handling matches the sorted wem_mapping.json
+        mapping_pairs = tuple(sorted(load_mapping_jsonl(map_path).items()))
+    elif MSGSPEC_AVAILABLE:
+        with open(map_path, "rb") as f:
+            mapping = _MAPPING_DECODER.decode(f.read())
+        mapping_pairs = tuple((media_path, entry.DebugName) for media_path, entry in mapping.items())
+    else:
+        mapping = load_json_file(map_path)
+        mapping_pairs = tuple((media_path, map_data.get("DebugName")) for media_path, map_data in mapping.items())
+    needs_normpath = any(
+        _path_needs_normpath(media_path) or (debug_name and _path_needs_normpath(debug_name))
+        for media_path, debug_name in mapping_pairs
+    )
+    return mapping_pairs, needs_normpath
+
+def _current_mapping_source(map_path):
+    """
+    Picks the file the copy operations load the mapping from, returning (path, mtime_ns, size) for the _load_* caches.
+    The wem_mapping.jsonl sidecar is used when its header records this exact wem_mapping.json (same mtime and
+    size; it is much smaller, having no SourceJsons lists), otherwise the JSON itself, e.g. after a hand edit.
+    """
+    map_stat = os.stat(map_path)
+    pairs_path = os.path.splitext(map_path)[0] + ".jsonl"
+    if _read_map_pairs_header(pairs_path) == (map_stat.st_mtime_ns, map_stat.st_size):
+        try:
+            pairs_stat = os.stat(pairs_path)
+            return pairs_path, pairs_stat.st_mtime_ns, pairs_stat.st_size
+        except OSError:
+            pass # Removed in between, use the JSON
+    return map_path, map_stat.st_mtime_ns, map_stat.st_size
+
+@functools.lru_cache(maxsize=4)
+def _load_rename_entries(map_path, mtime_ns, size):
+    """
+    Splits each mapping entry for unobfuscation into (MediaPathName, DebugName folder including its trailing
+    separator, output filename), and collects MediaPathNames without a DebugName. Cached like _load_mapping.
+    """
+    mapping_pairs, _ = _load_mapping(map_path, mtime_ns, size)
+    rename_entries = []
+    missing_debug_names = []
+    for media_path, debug_name in mapping_pairs:
+        if not debug_name:
+            missing_debug_names.append(media_path)
+            continue
+        # Split with str.rfind rather than os.path.basename/dirname/splitext for each entry
+        debug_sep = max(debug_name.rfind("/"), debug_name.rfind("\\"))
+        debug_base = debug_name[debug_sep + 1:]
+        debug_dot = debug_base.rfind(".")
+        debug_stem = debug_base[:debug_dot] if debug_dot > 0 else debug_base
+        media_sep = max(media_path.rfind("/"), media_path.rfind("\\"))
+        media_dot = media_path.rfind(".")
+        ext = media_path[media_dot:] if media_dot > media_sep + 1 else "" # Use original extension
+        rename_entries.append((media_path, debug_name[:debug_sep + 1], f"{debug_stem}{ext}"))
+    return tuple(rename_entries), tuple(missing_debug_names)
+
+def threaded_copy_tasks(copy_tasks, allow_hardlink=False):
+    """
+    Helper function to execute file copy tasks using a thread pool.
+    allow_hardlink lets copy_file_with_logging hard link files on the same filesystem instead of copying them.
+    """
     success_count = 0
     error_list = []
 
-    # Ensure destination directories exist before starting threads
-    for _, dst in copy_tasks:
-        os.makedirs(os.path.dirname(dst), exist_ok=True)
+    # Ensure destination directories exist before starting threads, once per distinct directory;
+    # shortest first, so parents are already known to exist and most directories take a single mkdir
+    clear_directory_cache()
+    for directory in sorted({os.path.dirname(dst) for _, dst in copy_tasks}, key=len):
+        ensure_directory(directory)
 
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as executor:
         # Submit copy tasks to the thread pool
-        future_to_task = {executor.submit(copy_file_with_logging, src, dst): (src, dst) for src, dst in copy_tasks}
+        future_to_task = {executor.submit(copy_file_with_logging, src, dst, allow_hardlink): (src, dst) for src, dst in copy_tasks}
 
         # Process results as they complete
         for future in as_completed(future_to_task):
@@ -222,109 +549,142 @@ def threaded_copy_tasks(copy_tasks):
 
     return success_count, error_list
 
-def unobfuscate_from_mapping(wem_dir, output_dir):
+def unobfuscate_from_mapping(wem_dir, output_dir, use_hardlink=False):
     """
     Unobfuscates WEM files using the PC version mapping.
     Renames files from Wwise ID to DebugName. Reads new mapping structure.
+    With use_hardlink, outputs on the same filesystem are hard links (no data copied), so editing them
+    in place also changes the source files.
     """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    map_path = os.path.join(script_dir, "wem_mapping.json")
+    map_path = MAP_PATH
 
     if not os.path.exists(map_path):
         logging.error("❌ wem_mapping.json (PC mapping) not found. Please generate it first using option 1.")
         return
 
-    with open(map_path, "r", encoding="utf-8") as f:
-        mapping = json.load(f)
+    mapping_source = _current_mapping_source(map_path)
+    _, use_normpath = _load_mapping(*mapping_source)
+    rename_entries, missing_debug_names = _load_rename_entries(*mapping_source)
 
-    copy_tasks = []
+    for media_path in missing_debug_names:
+        logging.warning(f"⚠️ Missing DebugName for {media_path} in mapping, skipping.")
 
     # Create copy tasks: source is Wwise ID path, destination is DebugName path
-    # Iterate through the mapping, accessing DebugName from the nested structure
-    for media_path, map_data in mapping.items():
-        debug_name = map_data.get("DebugName") # Get DebugName from the nested object
-        if not debug_name:
-             logging.warning(f"⚠️ Missing DebugName for {media_path} in mapping, skipping.")
-             continue
-
-        source_path = os.path.normpath(os.path.join(wem_dir, media_path))
-        debug_base = os.path.basename(debug_name)
-        ext = os.path.splitext(media_path)[1] # Use original extension
-        output_filename = f"{os.path.splitext(debug_base)[0]}{ext}"
-        dest_path = os.path.normpath(os.path.join(output_dir, os.path.dirname(debug_name), output_filename))
-        copy_tasks.append((source_path, dest_path))
+    if use_normpath:
+        copy_tasks = []
+        output_dirs = {} # DebugName folder -> normalized output directory, many entries share a folder
+        for media_path, debug_folder, output_filename in rename_entries:
+            dest_dir = output_dirs.get(debug_folder)
+            if dest_dir is None:
+                dest_dir = output_dirs[debug_folder] = os.path.normpath(os.path.join(output_dir, debug_folder))
+            copy_tasks.append((os.path.normpath(os.path.join(wem_dir, media_path)), os.path.join(dest_dir, output_filename)))
+    else:
+        # Clean mapping paths can be appended to the directory prefixes without os.path.join/normpath
+        wem_prefix = os.path.join(wem_dir, "")
+        output_prefix = os.path.join(output_dir, "")
+        copy_tasks = [
+            (wem_prefix + media_path, output_prefix + debug_folder + output_filename)
+            for media_path, debug_folder, output_filename in rename_entries
+        ]
 
     logging.info(f"Starting unobfuscation of {len(copy_tasks)} files...")
-    success_count, error_list = threaded_copy_tasks(copy_tasks)
+    success_count, error_list = threaded_copy_tasks(copy_tasks, use_hardlink)
 
     logging.info(f"✅ PC Unobfuscation completed. Files copied: {success_count}")
     if error_list:
-        log_path = os.path.join(script_dir, "unobfuscate_error_log.log")
+        log_path = os.path.join(SCRIPT_DIR, "unobfuscate_error_log.log")
         with open(log_path, "w", encoding="utf-8") as f:
             for line in error_list:
                 f.write(f"{line}\n")
         logging.warning(f"⚠️ Some files could not be copied during unobfuscation. See: {log_path}")
 
-def obfuscate_from_mapping(wem_dir, output_dir):
+def obfuscate_from_mapping(wem_dir, output_dir, use_hardlink=False):
     """
     Obfuscates WEM files using the PC version mapping.
     Renames files from DebugName back to Wwise ID. Reads new mapping structure.
+    use_hardlink works as in unobfuscate_from_mapping.
     """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    map_path = os.path.join(script_dir, "wem_mapping.json")
+    map_path = MAP_PATH
 
     if not os.path.exists(map_path):
         logging.error("❌ wem_mapping.json (PC mapping) not found. Please generate it first using option 1.")
         return
 
-    with open(map_path, "r", encoding="utf-8") as f:
-        mapping = json.load(f)
+    mapping_pairs, use_normpath = _load_mapping(*_current_mapping_source(map_path))
+    # Clean mapping paths can be appended to the directory prefixes without os.path.join/normpath
+    wem_prefix = os.path.join(wem_dir, "")
+    output_prefix = os.path.join(output_dir, "")
 
     copy_tasks = []
 
     # Create copy tasks: source is DebugName path, destination is Wwise ID path
-    # Need to build an inverted mapping from the new structure: DebugName -> MediaPathName
+    # Need to build an inverted mapping: DebugName -> MediaPathName
     inverted_mapping = {}
-    for media_path, map_data in mapping.items():
-        debug_name = map_data.get("DebugName")
+    duplicate_debug_names = [] # (DebugName, kept MediaPathName, discarded MediaPathName), reported after the loop
+    for media_path, debug_name in mapping_pairs:
         if debug_name:
              # If multiple MediaPaths map to the same DebugName, the last one processed wins
-             if debug_name in inverted_mapping:
-                 logging.warning(f"⚠️ Duplicate DebugName '{debug_name}' found in mapping. Keeping mapping to '{media_path}' and discarding mapping to '{inverted_mapping[debug_name]}'.")
+             previous_media_path = inverted_mapping.get(debug_name)
+             if previous_media_path is not None:
+                 duplicate_debug_names.append((debug_name, media_path, previous_media_path))
              inverted_mapping[debug_name] = media_path
         else:
              logging.warning(f"⚠️ Missing DebugName for {media_path} in mapping, cannot create inverted mapping entry.")
 
+    if duplicate_debug_names:
+        examples = "; ".join(f"'{debug_name}' → '{kept}' (discarded '{discarded}')" for debug_name, kept, discarded in duplicate_debug_names[:5])
+        logging.warning(f"⚠️ {len(duplicate_debug_names)} duplicate DebugName(s) found in mapping, keeping the last MediaPathName for each. E.g. {examples}")
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            for debug_name, kept, discarded in duplicate_debug_names:
+                logging.debug("Duplicate DebugName '%s': keeping '%s', discarding '%s'", debug_name, kept, discarded)
+
+    # With clean mapping paths, scan wem_dir once instead of two os.path.exists calls per entry;
+    # keys are normcased paths relative to wem_dir
+    existing_sources = None
+    if not use_normpath:
+        existing_sources = {os.path.normcase(path[len(wem_prefix):]) for path, _ in _iter_files(wem_dir, (".wem", ".wav"))}
 
     for debug_name, media_path in inverted_mapping.items():
         # The source file will have the debug name, potentially with .wem extension
         # based on how the unobfuscation saved it.
         # We need to account for both .wav (from debug_name) and .wem extensions.
-        source_base = os.path.splitext(debug_name)[0]
-        source_path_wem = os.path.normpath(os.path.join(wem_dir, f"{source_base}.wem"))
-        source_path_wav = os.path.normpath(os.path.join(wem_dir, f"{source_base}.wav")) # Might exist if converted
+        # Strip the extension with str.rfind, as unobfuscate does, rather than os.path.splitext
+        debug_sep = max(debug_name.rfind("/"), debug_name.rfind("\\"))
+        debug_dot = debug_name.rfind(".")
+        source_base = debug_name[:debug_dot] if debug_dot > debug_sep + 1 else debug_name
+        if use_normpath:
+            source_path_wem = os.path.normpath(os.path.join(wem_dir, f"{source_base}.wem"))
+            source_path_wav = os.path.normpath(os.path.join(wem_dir, f"{source_base}.wav")) # Might exist if converted
+        else:
+            source_path_wem = f"{wem_prefix}{source_base}.wem"
+            source_path_wav = f"{wem_prefix}{source_base}.wav" # Might exist if converted
 
         # Determine the actual source file path
         source_file_found = None
-        if os.path.exists(source_path_wem):
+        if existing_sources is not None and os.path.normcase(f"{source_base}.wem") in existing_sources:
+            source_file_found = source_path_wem
+        elif existing_sources is not None and os.path.normcase(f"{source_base}.wav") in existing_sources:
+            source_file_found = source_path_wav
+        # Still check the disk for files the scan can't see (behind symlinked folders, other letter case on case-insensitive disks)
+        elif os.path.exists(source_path_wem):
             source_file_found = source_path_wem
         elif os.path.exists(source_path_wav):
              source_file_found = source_path_wav
 
         if source_file_found:
             # The destination path is the original Wwise ID path
-            dest_path = os.path.normpath(os.path.join(output_dir, media_path))
+            dest_path = os.path.normpath(os.path.join(output_dir, media_path)) if use_normpath else output_prefix + media_path
             copy_tasks.append((source_file_found, dest_path))
         else:
             logging.warning(f"⚠️ Source file not found for obfuscation: {source_path_wem} or {source_path_wav} (expected from debug name: {debug_name})")
 
 
     logging.info(f"Starting obfuscation of {len(copy_tasks)} files...")
-    success_count, error_list = threaded_copy_tasks(copy_tasks)
+    success_count, error_list = threaded_copy_tasks(copy_tasks, use_hardlink)
 
     logging.info(f"✅ PC Obfuscation completed. Files copied: {success_count}")
     if error_list:
-        log_path = os.path.join(script_dir, "obfuscate_error_log.log")
+        log_path = os.path.join(SCRIPT_DIR, "obfuscate_error_log.log")
         with open(log_path, "w", encoding="utf-8") as f:
             for line in error_list:
                 f.write(f"{line}\n")
@@ -335,7 +695,7 @@ def list_ps4_wem_files(ps4_wem_dir):
     """
     Lists all .wem files within a given directory for the PS4 version,
     saving their relative paths to a JSON file.
-    (This function is now largely redundant with find_ps4_wem_duplicates but kept for completeness)
+    (find_ps4_wem_duplicates writes the same list during its own scan; this is kept for standalone use)
     """
     wem_files_list = []
     if not os.path.isdir(ps4_wem_dir):
@@ -343,21 +703,21 @@ def list_ps4_wem_files(ps4_wem_dir):
         return
 
     logging.info(f"Scanning directory for PS4 WEM files: {ps4_wem_dir}")
-    for root, _, files in os.walk(ps4_wem_dir):
-        for filename in files:
-            if filename.lower().endswith(".wem"):
-                # Get the path relative to the input directory
-                relative_path = os.path.relpath(os.path.join(root, filename), ps4_wem_dir)
-                wem_files_list.append(relative_path)
-                logging.debug(f"Found: {relative_path}") # Changed to debug for less clutter
+    for full_path, _ in _iter_files(ps4_wem_dir, ".wem"):
+        # Get the path relative to the input directory
+        relative_path = os.path.relpath(full_path, ps4_wem_dir)
+        wem_files_list.append(relative_path)
+        logging.debug("Found: %s", relative_path) # Changed to debug for less clutter
 
 
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    output_path = os.path.join(script_dir, "ps4_wem_list.json")
+    write_ps4_wem_list(wem_files_list)
+
+def write_ps4_wem_list(wem_files_list):
+    """Saves the relative paths of the PS4 .wem files to ps4_wem_list.json, sorted for consistency."""
+    output_path = PS4_LIST_PATH
 
     # Write the list to a JSON file with sorted entries
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(sorted(wem_files_list), f, indent=2) # Sort the list for consistency
+    dump_json_file(sorted(wem_files_list), output_path) # Sort the list for consistency
 
     logging.info(f"✅ PS4 WEM file list generated and saved to: {output_path} ({len(wem_files_list)} files found)")
 
@@ -366,157 +726,175 @@ def find_ps4_wem_duplicates(ps4_wem_dir):
     Finds and lists ALL .wem files within a given directory for the PS4 version,
     organized by specified folder types.
     Outputs relative paths, file size, duration, and lists all categories the file appears in.
+    ps4_wem_analysis.json holds {"files": {filename: info}, "by_category": {category: [filename, ...]}}.
+    Also writes ps4_wem_list.json from the same directory walk, so list_ps4_wem_files
+    doesn't need to be run separately.
     Calculates duration using vgmstream-cli.
     Includes cleanup for .wav files in the input directory.
     """
-    file_info_by_filename = defaultdict(lambda: {"paths": [], "all_categories": set(), "size": 0, "duration": "N/A (Processing)"}) # Add size and duration processing status
-    categorized_files = defaultdict(dict) # Use a dict for filenames within each category
+    # Per-filename info kept as parallel lists indexed by a filename id, rather than a dict per filename
+    filename_ids = {}
+    filenames = []
+    file_dir_ixs = [] # Directory indices of every copy of the file
+    file_categories = [] # Set of categories the file appears in
+    file_sizes = array("q") # Size in bytes (assuming size is same for all instances, the last one found is kept)
+    file_first_paths = [] # Full path of the first copy found, the one whose duration is reported
+    filenames_by_category = defaultdict(list) # Category -> filenames found in it
 
-    # Define the prefixes for categorization
-    folder_types = [
-        "Act_", "Ambience_", "Foley_", "Footsteps_", "Generic_", "music_",
-        "Sequences_", "SFX_", "Choices", "Butterfly_effect_bank", "Frontend",
-        "Global_", "VFX_", "Wendigo_"
-    ]
-    other_category = "Other"
+    other_category = OTHER_CATEGORY
 
     if not os.path.isdir(ps4_wem_dir):
         logging.error(f"❌ Directory not found: {ps4_wem_dir}")
         return
 
     logging.info(f"Scanning directory for PS4 WEM files: {ps4_wem_dir}")
-    wem_files_to_process = []
-    for root, _, files in os.walk(ps4_wem_dir):
-        for filename in files:
-            if filename.lower().endswith(".wem"):
-                full_path = os.path.join(root, filename)
-                relative_path = os.path.relpath(full_path, ps4_wem_dir)
-
-                # Get file size
-                try:
-                    file_size = os.path.getsize(full_path)
-                except Exception as e:
-                    logging.warning(f"⚠️ Could not get size for {full_path}: {e}")
-                    file_size = 0 # Default to 0 if size cannot be obtained
-
-                # Store info keyed by filename
-                file_info_by_filename[filename]["paths"].append(relative_path)
-                file_info_by_filename[filename]["size"] = file_size # Store size (assuming size is same for all instances, or take one)
-
-                # Determine category for this specific path
-                parent_dir = os.path.basename(os.path.dirname(full_path))
-                matched_category = other_category
-                for prefix in folder_types:
-                    if parent_dir.lower().startswith(prefix.lower()):
-                        matched_category = prefix
-                        break
-                file_info_by_filename[filename]["all_categories"].add(matched_category)
+    wem_files_list = [] # (directory index, filename) for ps4_wem_list.json
+    # Paths are stored as an index into relative_dirs plus the filename; the relative path and the
+    # category are worked out once per directory rather than per file
+    dir_index = {}
+    relative_dirs = []
+    dir_categories = []
+    wav_files = [] # Leftover .wav files, found by the same scan and deleted at the end
+    for entry in _iter_file_entries(ps4_wem_dir, (".wem", ".wav")):
+        full_path, filename = entry.path, entry.name
+        if filename[-4:].lower() == ".wav":
+            wav_files.append(full_path)
+            continue
+        parent_dir = os.path.dirname(full_path)
+        dir_ix = dir_index.get(parent_dir)
+        if dir_ix is None:
+            dir_ix = dir_index[parent_dir] = len(relative_dirs)
+            relative_dir = os.path.relpath(parent_dir, ps4_wem_dir)
+            relative_dirs.append("" if relative_dir == os.curdir else relative_dir)
+            # Determine category for this directory
+            prefix_match = _PREFIX_RE.match(os.path.basename(parent_dir))
+            dir_categories.append(_LOWER_TO_ORIG[prefix_match.group(1).lower()] if prefix_match else other_category)
+
+        # Get file size (from the scan's DirEntry rather than another os.path.getsize call)
+        try:
+            file_size = entry.stat().st_size
+        except Exception as e:
+            logging.warning(f"⚠️ Could not get size for {full_path}: {e}")
+            file_size = 0 # Default to 0 if size cannot be obtained
+
+        # Store info under the filename's id
+        file_id = filename_ids.get(filename)
+        if file_id is None:
+            filename_ids[filename] = len(filenames)
+            filenames.append(filename)
+            file_first_paths.append(full_path)
+            file_dir_ixs.append([dir_ix])
+            file_categories.append({dir_categories[dir_ix]})
+            file_sizes.append(file_size)
+        else:
+            file_dir_ixs[file_id].append(dir_ix)
+            file_categories[file_id].add(dir_categories[dir_ix])
+            file_sizes[file_id] = file_size
 
-                wem_files_to_process.append(full_path) # Add file to list for duration processing
+        wem_files_list.append((dir_ix, filename)) # Listing for ps4_wem_list.json
 
-                logging.debug(f"Scanning: {full_path} (Size: {file_size} bytes)")
+    write_ps4_wem_list([os.path.join(relative_dirs[dir_ix], filename) for dir_ix, filename in wem_files_list])
 
     # --- Process WEM files for duration using vgmstream-cli via ThreadPoolExecutor ---
-    logging.info(f"Starting WEM duration calculation using vgmstream-cli for {len(wem_files_to_process)} files...")
     duration_results = {} # Store results {full_path: duration_string}
 
     # Check if vgmstream-cli is available before starting the pool
     if os.path.exists(VGMSTREAM_PATH):
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            future_to_wem = {executor.submit(get_wem_duration_vgmstream, wem_path): wem_path for wem_path in wem_files_to_process}
-
-            for future in as_completed(future_to_task):
-                wem_path = future_to_wem[future]
+        # Only the first copy of each filename is reported, and byte-identical copies under different
+        # names share a duration, so vgmstream-cli only runs once per distinct (size, header hash)
+        with ThreadPoolExecutor(max_workers=DURATION_WORKERS) as executor:
+            fingerprints = list(executor.map(_wem_fingerprint, file_first_paths))
+        paths_by_fingerprint = {}
+        for wem_path, fingerprint in zip(file_first_paths, fingerprints):
+            paths_by_fingerprint.setdefault(fingerprint or wem_path, []).append(wem_path)
+        wem_files_to_process = [same_paths[0] for same_paths in paths_by_fingerprint.values()]
+        logging.info(f"Starting WEM duration calculation using vgmstream-cli for {len(wem_files_to_process)} distinct files ({len(file_first_paths)} filenames)...")
+
+        # Batch files per vgmstream-cli run, but small enough that every worker gets a share
+        batch_files = max(1, min(VGMSTREAM_BATCH_FILES, -(-len(wem_files_to_process) // DURATION_WORKERS)))
+        with ThreadPoolExecutor(max_workers=DURATION_WORKERS) as executor:
+            future_to_batch = {
+                executor.submit(get_wem_durations_vgmstream, batch): batch
+                for batch in _batch_wem_paths(wem_files_to_process, batch_files)
+            }
+
+            for future in as_completed(future_to_batch):
+                batch = future_to_batch[future]
                 try:
-                    duration = future.result()
-                    duration_results[wem_path] = duration
-                    # logging.debug(f"Processed {os.path.basename(wem_path)}: Duration {duration}") # Moved to get_wem_duration_vgmstream
+                    duration_results.update(future.result())
                 except Exception as e:
-                    logging.error(f"❌ Exception processing {os.path.basename(wem_path)} for duration: {e}")
-                    duration_results[wem_path] = "N/A (Processing Error)"
+                    logging.error(f"❌ Exception processing a batch of {len(batch)} file(s) for duration, starting with {os.path.basename(batch[0])}: {e}")
+                    for wem_path in batch:
+                        duration_results[wem_path] = "N/A (Processing Error)"
+
+        # Share each result with the byte-identical copies
+        for same_paths in paths_by_fingerprint.values():
+            for wem_path in same_paths[1:]:
+                duration_results[wem_path] = duration_results[same_paths[0]]
     else:
         logging.warning("⚠️ Skipping WEM duration calculation due to missing vgmstream-cli.exe at expected location.")
-        for wem_path in wem_files_to_process:
+        for wem_path in file_first_paths:
              duration_results[wem_path] = "N/A (vgmstream-cli Missing)"
     # ---------------------------------------------------------------------------------
 
 
-    # Populate the categorized_files structure with aggregated info and actual duration
-    all_filenames = list(file_info_by_filename.keys())
-    logging.debug("Populating categorized_files structure with duration...")
+    # Populate the analysis structure with aggregated info and actual duration:
+    # every filename's info once under "files", and each category as a sorted
+    # list of filenames under "by_category" (a file in several categories isn't repeated)
+    logging.debug("Populating the analysis structure with duration...")
 
-    for filename in all_filenames:
-        info = file_info_by_filename[filename]
-        all_categories_list = sorted(list(info["all_categories"])) # Get sorted list of all categories
+    files = {}
+    for file_id in sorted(range(len(filenames)), key=filenames.__getitem__):
+        filename = filenames[file_id]
+        paths = [os.path.join(relative_dirs[dir_ix], filename) for dir_ix in file_dir_ixs[file_id]] # Back to relative paths
+        all_categories_list = sorted(file_categories[file_id]) # Get sorted list of all categories
 
         # Find the duration for this filename (assuming all instances have the same duration)
         # We can take the duration from the first path found for this filename
-        duration_for_filename = "N/A"
-        if info["paths"]:
-            # Need to find the full path from the relative path to look up in duration_results
-            first_relative_path = info["paths"][0]
-            first_full_path = os.path.join(ps4_wem_dir, first_relative_path)
-            duration_for_filename = duration_results.get(first_full_path, "N/A (Lookup Error)")
-
-
-        # For each category this filename belongs to, add an entry
+        duration_for_filename = duration_results.get(file_first_paths[file_id], "N/A (Lookup Error)")
+
+        files[filename] = {
+            "paths": sorted(paths), # Store sorted paths
+            "all_categories": all_categories_list,
+            "size": file_sizes[file_id], # Include size
+            "duration": duration_for_filename # Include calculated duration
+        }
+        # Filenames are visited in sorted order, so each category's list comes out sorted
         for category in all_categories_list:
-             # Ensure the category exists in the output structure
-             if filename not in categorized_files[category]:
-                 categorized_files[category][filename] = {
-                     "paths": sorted(info["paths"]), # Store sorted paths
-                     "all_categories": all_categories_list,
-                     "size": info["size"], # Include size
-                     "duration": duration_for_filename # Include calculated duration
-                 }
-             # Note: If a file is in multiple categories, its entry (with all paths, size, duration)
-             # will appear under each relevant category key in categorized_files.
-
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    output_path = os.path.join(script_dir, "ps4_wem_analysis.json") # Changed output filename
+            filenames_by_category[category].append(filename)
+
+    output_path = ANALYSIS_PATH
 
     # Sort the categories, ensuring "Other" is last
-    sorted_categories = sorted(categorized_files.keys())
+    sorted_categories = sorted(filenames_by_category.keys())
     if other_category in sorted_categories:
         sorted_categories.remove(other_category)
         sorted_categories.append(other_category)
 
-    sorted_categorized_files = {}
-    for category in sorted_categories:
-        if category in categorized_files: # Ensure category exists after sorting
-            # Sort filenames within each category
-            sorted_filenames_in_category = dict(sorted(categorized_files[category].items()))
-            # Sort paths within each filename entry (already done during population, but re-sort for safety)
-            for filename, data in sorted_filenames_in_category.items():
-                 data["paths"] = sorted(data["paths"]) # Ensure paths are sorted
-
-            sorted_categorized_files[category] = sorted_filenames_in_category
-
+    analysis = {
+        "files": files,
+        "by_category": {category: filenames_by_category[category] for category in sorted_categories}
+    }
 
     # Write the categorized file information to a JSON file
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(sorted_categorized_files, f, indent=2)
+    dump_json_file(analysis, output_path)
 
-    total_files_found = sum(len(files_data) for files_data in categorized_files.values())
-    logging.info(f"✅ PS4 WEM file analysis generated and saved to: {output_path} ({total_files_found} unique filenames categorized across {len(categorized_files)} categories).")
+    logging.info(f"✅ PS4 WEM file analysis generated and saved to: {output_path} ({len(files)} unique filenames categorized across {len(sorted_categories)} categories).")
     logging.info("Note: Duration calculation attempted using vgmstream-cli.")
 
     # --- Cleanup: Delete .wav files in the input directory ---
-    logging.info(f"Starting cleanup: Searching for and deleting .wav files in {ps4_wem_dir}...")
+    logging.info(f"Starting cleanup: Deleting {len(wav_files)} .wav file(s) found in {ps4_wem_dir}...")
     deleted_count = 0
     try:
-        for root, _, files in os.walk(ps4_wem_dir):
-            for filename in files:
-                if filename.lower().endswith(".wav"):
-                    wav_file_path = os.path.join(root, filename)
-                    try:
-                        os.remove(wav_file_path)
-                        logging.debug(f"Deleted: {wav_file_path}")
-                        deleted_count += 1
-                    except OSError as e:
-                        logging.warning(f"⚠️ Failed to delete {wav_file_path}: {e}")
-                    except Exception as e:
-                        logging.warning(f"⚠️ An unexpected error occurred while deleting {wav_file_path}: {e}")
+        for wav_file_path in wav_files:
+            try:
+                os.remove(wav_file_path)
+                logging.debug("Deleted: %s", wav_file_path)
+                deleted_count += 1
+            except OSError as e:
+                logging.warning(f"⚠️ Failed to delete {wav_file_path}: {e}")
+            except Exception as e:
+                logging.warning(f"⚠️ An unexpected error occurred while deleting {wav_file_path}: {e}")
         logging.info(f"✅ Cleanup finished. Deleted {deleted_count} .wav file(s).")
     except Exception as e:
         logging.error(f"❌ An error occurred during .wav file cleanup: {e}")
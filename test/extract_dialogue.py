@@ -1,92 +1,278 @@
 import os
 import json
+import argparse
+import hashlib
+import itertools
+import functools
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import re
 import openpyxl
 from openpyxl.utils import get_column_letter
-from openpyxl.styles import Alignment
-
-def extract_dialogue_data(folder_path, desired_languages):
+from openpyxl.styles import Alignment, Font
+from openpyxl.cell import WriteOnlyCell
+
+# Attempt to import orjson (much faster JSON parsing); the standard json module is used otherwise
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def json_loads(data):
+    """Parses JSON from bytes with orjson when available (as in utils.py, which this standalone script can't import)."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj):
+    """Serializes obj to compact UTF-8 encoded JSON bytes, with orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+
+# Attempt to import ijson (streams large JSON files and stops at the dialogue asset instead of loading them whole)
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+    JSON_DECODE_ERRORS = (json.JSONDecodeError, ijson.JSONError)
+except ImportError:
+    IJSON_AVAILABLE = False
+    JSON_DECODE_ERRORS = (json.JSONDecodeError,)
+
+# Attempt to import xlsxwriter (optional --engine xlsxwriter, which streams rows to disk in constant memory)
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+# Output columns, in order; _process_file returns one list per column
+COLUMNS = ("Language", "DialogueKey", "Section", "SubSection", "SubSectionType",
+           "DialogueContext", "IsPlaceholder", "CharacterName", "DisplayText")
+
+# Low-cardinality columns stored as pandas categoricals (integer codes plus one copy of each distinct value),
+# which shrinks the frame and makes the SubSection groupby work on codes
+CATEGORICAL_COLUMNS = ("Language", "Section", "SubSection", "SubSectionType", "CharacterName", "IsPlaceholder")
+
+# Worker processes for JSON parsing (Windows caps process pools at 61 workers)
+MAX_WORKERS = min(os.cpu_count() or 1, 61)
+
+# JSON files at least this big are streamed with ijson (when installed); smaller ones parse faster in one go
+STREAM_JSON_MIN_SIZE = 2 * 1024 * 1024
+
+# Stored with every --cache-dir entry; bump it when the extracted columns change so older entries are ignored
+CACHE_VERSION = 1
+
+def _cache_path(cache_dir, file_path, raw, desired_languages):
+    """
+    Cache file for a JSON file's contents and language selection (content-addressed, so renames still hit).
+    raw is the file's bytes, or None to hash the file in chunks when it is being streamed.
+    """
+    if raw is not None:
+        key = hashlib.sha256(raw)
+    else:
+        key = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                key.update(chunk)
+    key.update("\n".join(sorted(desired_languages)).encode("utf-8"))
+    return os.path.join(cache_dir, f"{key.hexdigest()}.json")
+
+def _read_cache(cache_path):
+    """
+    Returns the cached column lists, or None if there is no usable entry. Entries are plain JSON
+    (never pickle), so a file placed in the cache folder can at worst supply wrong rows, not run code.
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            entry = json_loads(f.read())
+        version, columns = entry["version"], entry["columns"]
+    except Exception:
+        return None # Missing or unreadable entry, extract again
+    if (version != CACHE_VERSION or not isinstance(columns, list) or len(columns) != len(COLUMNS)
+            or not all(isinstance(column, list) and len(column) == len(columns[0]) for column in columns)):
+        return None # Stale or malformed entry
+    return tuple(columns)
+
+def _write_cache(cache_path, columns):
+    """Stores column lists, writing to a temporary file first so a concurrent reader never sees half an entry."""
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(json_dumps({"version": CACHE_VERSION, "columns": columns}))
+        os.replace(temp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"    Warning: Could not write cache entry {cache_path}: {e}")
+
+def _stream_ps_asset(file_path):
+    """Streams a large asset JSON file's top-level list with ijson and returns the PSExternalMediaAsset, or None."""
+    with open(file_path, 'rb') as f:
+        # use_float keeps numbers as floats, as json/orjson would return them
+        return next((item for item in ijson.items(f, 'item', use_float=True) if item.get("Type") == "PSExternalMediaAsset"), None)
+
+def _process_file(file_path, desired_languages, cache_dir=None):
+    """
+    Extracts the dialogue rows of one JSON file for the given languages.
+    Runs in a worker process; returns (columns, error), where columns is a tuple of column lists
+    in COLUMNS order and error is None or a message for the main process to print.
+    With cache_dir, the result for unchanged file contents is loaded from there instead.
+    """
+    # One list per column instead of a dict per row; the DataFrame is built from them in one go
+    languages = []
+    dialogue_keys = []
+    sections = []
+    sub_sections = []
+    sub_section_types = []
+    dialogue_contexts = []
+    is_placeholders = []
+    character_names = []
+    display_texts_column = []
+
+    filename = os.path.basename(file_path)
+    # print(f"  Processing file: {filename}") # Reduced console output
+
+    try:
+        stream = IJSON_AVAILABLE and os.path.getsize(file_path) >= STREAM_JSON_MIN_SIZE
+        raw = None
+        if not stream:
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+        cache_path = None
+        if cache_dir is not None:
+            cache_path = _cache_path(cache_dir, file_path, raw, desired_languages)
+            cached_columns = _read_cache(cache_path)
+            if cached_columns is not None:
+                return cached_columns, None
+
+        # Find the PSExternalMediaAsset object (asset exports are a top-level list)
+        if stream:
+            ps_asset = _stream_ps_asset(file_path)
+        else:
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError, so the handler below catches both
+            data = json_loads(raw)
+            ps_asset = None
+            if isinstance(data, list):
+                ps_asset = next((item for item in data if item.get("Type") == "PSExternalMediaAsset"), None)
+
+        if ps_asset and "Properties" in ps_asset and "LocalisedDialogueData" in ps_asset["Properties"]:
+            localised_data = ps_asset["Properties"]["LocalisedDialogueData"]
+
+            # Bound once per file rather than looked up for every entry
+            append_language = languages.append
+            append_dialogue_key = dialogue_keys.append
+            append_section = sections.append
+            append_sub_section = sub_sections.append
+            append_sub_section_type = sub_section_types.append
+            append_dialogue_context = dialogue_contexts.append
+            append_is_placeholder = is_placeholders.append
+            append_character_name = character_names.append
+            append_display_text = display_texts_column.append
+
+            for entry in localised_data:
+                lang_key = entry.get("Key")
+                lang_value = entry.get("Value")
+
+                if lang_key and lang_value and lang_key in desired_languages:
+                    # Extract and combine DisplayText from SubtitleLines, joining the non-empty ones
+                    # with a newline (one lookup per line; lines that are None are skipped).
+                    # Done before appending anything, so a malformed entry can't leave the columns uneven
+                    get = lang_value.get
+                    combined_display_text = ""
+                    subtitle_lines = get("SubtitleLines")
+                    if subtitle_lines:
+                        combined_display_text = "\n".join([
+                            display_text for line in subtitle_lines
+                            if line is not None and (display_text := line.get("DisplayText"))
+                        ])
+
+                    # Extract properties from the specific language's Value dictionary
+                    append_language(lang_key)
+                    append_dialogue_key(get("DialogueKey", "N/A"))
+                    append_section(get("Section", "N/A"))
+                    append_sub_section(get("SubSection", "N/A"))
+                    append_sub_section_type(get("SubSectionType", "N/A"))
+                    append_dialogue_context(get("DialogueContext", "N/A"))
+                    append_is_placeholder(get("bIsPlaceholder", "N/A"))
+                    append_character_name(get("CharacterName", "N/A"))
+                    append_display_text(combined_display_text)
+        # else: # Reduced console output for files without the target asset
+            # print(f"    Warning: Could not find PSExternalMediaAsset or LocalisedDialogueData in {filename}")
+
+        if cache_path is not None:
+            _write_cache(cache_path, (languages, dialogue_keys, sections, sub_sections, sub_section_types,
+                                      dialogue_contexts, is_placeholders, character_names, display_texts_column))
+
+    except JSON_DECODE_ERRORS:
+        error = f"    Error: Could not decode JSON from {filename}"
+    except Exception as e:
+        error = f"    An unexpected error occurred while processing {filename}: {e}"
+    else:
+        error = None
+
+    # Rows found before an error are kept
+    return (languages, dialogue_keys, sections, sub_sections, sub_section_types,
+            dialogue_contexts, is_placeholders, character_names, display_texts_column), error
+
+def _concat_lists(lists):
+    """Concatenates lists into one allocated at its final size up front, rather than grown as items are added."""
+    combined = [None] * sum(map(len, lists))
+    position = 0
+    for part in lists:
+        combined[position:position + len(part)] = part
+        position += len(part)
+    return combined
+
+def extract_dialogue_data(folder_path, desired_languages, cache_dir=None):
     """
     Extracts dialogue data from JSON files in a specified folder for given languages.
+    The files are independent, so they are parsed in parallel worker processes.
 
     Args:
         folder_path (str): The path to the folder containing the JSON files.
         desired_languages (list): A list of language keys (strings) to extract.
+        cache_dir (str, optional): Folder for caching each file's extracted rows between runs.
 
     Returns:
         pandas.DataFrame: A DataFrame containing the extracted dialogue data.
     """
-    all_data = []
-
     print(f"Processing files in folder: {folder_path}")
 
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".json"):
-            file_path = os.path.join(folder_path, filename)
-            # print(f"  Processing file: {filename}") # Reduced console output
-
+    # Checked for every LocalisedDialogueData entry, so use a set (frozen, to ship it to the workers as is)
+    desired_languages = frozenset(desired_languages)
+
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # scandir entries carry their path and file type, so no name list is built and filtered separately
+    with os.scandir(folder_path) as entries:
+        file_paths = [entry.path for entry in entries if entry.name.endswith(".json") and entry.is_file()]
+
+    # Files are handed to workers 16 at a time to cut per-task pickling; map keeps them in listing order
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(_process_file, file_paths, itertools.repeat(desired_languages),
+                                    itertools.repeat(cache_dir), chunksize=16))
+
+    # Workers return their errors instead of printing them; report them together, in listing order
+    for _, error in results:
+        if error is not None:
+            print(error)
+
+    # Concatenate each column's per-file lists (the total row count is known once every file is done)
+    extracted_df = pd.DataFrame({
+        column: _concat_lists(column_lists)
+        for column, column_lists in zip(COLUMNS, zip(*(columns for columns, _ in results)))
+    })
+    if not extracted_df.empty:
+        # Missing values (JSON nulls) become NaN in a category column; both sheet writers write them as empty cells
+        for column in CATEGORICAL_COLUMNS:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                # Find the PSExternalMediaAsset object
-                ps_asset = None
-                for item in data:
-                    if item.get("Type") == "PSExternalMediaAsset":
-                        ps_asset = item
-                        break
-
-                if ps_asset and "Properties" in ps_asset and "LocalisedDialogueData" in ps_asset["Properties"]:
-                    localised_data = ps_asset["Properties"]["LocalisedDialogueData"]
-
-                    for entry in localised_data:
-                        lang_key = entry.get("Key")
-                        lang_value = entry.get("Value")
-
-                        if lang_key and lang_value and lang_key in desired_languages:
-                             # Extract properties from the specific language's Value dictionary
-                            section = lang_value.get("Section", "N/A")
-                            sub_section = lang_value.get("SubSection", "N/A")
-                            sub_section_type = lang_value.get("SubSectionType", "N/A")
-                            dialogue_context = lang_value.get("DialogueContext", "N/A")
-                            dialogue_key = lang_value.get("DialogueKey", "N/A")
-                            is_placeholder = lang_value.get("bIsPlaceholder", "N/A")
-                            character_name = lang_value.get("CharacterName", "N/A")
-
-                            # Extract and combine DisplayText from SubtitleLines
-                            combined_display_text = ""
-                            subtitle_lines = lang_value.get("SubtitleLines", [])
-                            if subtitle_lines:
-                                display_texts = [
-                                    line.get("DisplayText", "")
-                                    for line in subtitle_lines
-                                    if line is not None and "DisplayText" in line # Ensure line is not None and has DisplayText key
-                                ]
-                                # Join non-empty display texts with a newline
-                                combined_display_text = "\n".join(filter(None, display_texts))
-
-
-                            all_data.append({
-                                "Language": lang_key,
-                                "DialogueKey": dialogue_key,
-                                "Section": section,
-                                "SubSection": sub_section,
-                                "SubSectionType": sub_section_type,
-                                "DialogueContext": dialogue_context,
-                                "IsPlaceholder": is_placeholder,
-                                "CharacterName": character_name,
-                                "DisplayText": combined_display_text # Added DisplayText
-                            })
-                # else: # Reduced console output for files without the target asset
-                    # print(f"    Warning: Could not find PSExternalMediaAsset or LocalisedDialogueData in {filename}")
-
-            except json.JSONDecodeError:
-                print(f"    Error: Could not decode JSON from {filename}")
-            except Exception as e:
-                print(f"    An unexpected error occurred while processing {filename}: {e}")
-
-    return pd.DataFrame(all_data)
+                extracted_df[column] = extracted_df[column].astype('category')
+            except TypeError:
+                pass # Unhashable values (e.g. a list in the JSON) can't be categories; keep the column as is
+    return extracted_df
+
+# Maps the characters Excel doesn't allow in sheet names to underscores, for str.translate
+INVALID_SHEET_CHARS_TABLE = str.maketrans(dict.fromkeys('\\/:?*[]', '_'))
 
 # Helper function to create valid Excel sheet names
 def create_valid_sheet_name(name):
@@ -95,19 +281,129 @@ def create_valid_sheet_name(name):
         return "No_SubSection"
     name = str(name) # Ensure it's a string
     # Replace invalid characters for Excel sheet names
-    invalid_chars = r'[\\/:?*\[\]]'
-    cleaned_name = re.sub(invalid_chars, '_', name)
+    cleaned_name = name.translate(INVALID_SHEET_CHARS_TABLE)
     # Excel sheet names cannot start or end with an apostrophe
     cleaned_name = cleaned_name.strip("'")
      # Replace leading/trailing spaces and dots
     cleaned_name = cleaned_name.strip(' .')
     # Replace multiple underscores with a single one
-    cleaned_name = re.sub(r'_{2,}', '_', cleaned_name)
+    # (plain str.replace; splitting on '_' and re-joining would also drop leading/trailing underscores)
+    while '__' in cleaned_name:
+        cleaned_name = cleaned_name.replace('__', '_')
     # Truncate to max 31 characters
     return cleaned_name[:31]
 
+# Styles shared by every cell, created once rather than per cell
+CENTER_ALIGNED_TEXT = Alignment(horizontal='center', vertical='center')
+LEFT_ALIGNED_TEXT = Alignment(horizontal='left', vertical='center', wrap_text=True)
+HEADER_FONT = Font(bold=True)
+
+def column_widths(group_df):
+    """
+    Autofit widths for a SubSection's columns: the longest line of any cell or the header,
+    plus padding, times a factor, at least 10.
+    """
+    widths = []
+    for column in group_df.columns:
+        # Newlines make a cell taller, but don't affect width directly; use the longest line of any cell
+        # (empty cells count as 0), computed per column with pandas string ops rather than cell by cell
+        line_lengths = group_df[column].map(str, na_action='ignore').str.split('\n').explode().str.len().fillna(0)
+        max_length = max(len(str(column)), int(line_lengths.max())) # Header length counts too
+        # Excel column width units are based on the width of the digit 0; (max_length + padding) * factor
+        # with a minimum width so columns aren't too narrow
+        widths.append(max((max_length + 1) * 0.9, 10))
+    return widths
+
+def write_dialogue_sheet(workbook, sheet_name, group_df):
+    """
+    Appends one SubSection's rows as a sheet of a write-only workbook: bold header row frozen,
+    cells centered (DisplayText left-aligned and wrapped) and columns sized to their longest line.
+    All formatting is set up before or while the rows are appended, so the sheet is written in one pass.
+    """
+    worksheet = workbook.create_sheet(title=sheet_name)
+    columns = list(group_df.columns)
+
+    # A write-only sheet can't be read back, so the widths are worked out from the data
+    # and set before the first row is written
+    for col_index, width in enumerate(column_widths(group_df)):
+        worksheet.column_dimensions[get_column_letter(col_index + 1)].width = width
+
+    # Freeze the first row
+    worksheet.freeze_panes = 'A2'
+
+    # DisplayText is left-aligned and wrapped, everything else centered (header row included)
+    alignments = [LEFT_ALIGNED_TEXT if column == 'DisplayText' else CENTER_ALIGNED_TEXT for column in columns]
+    if 'DisplayText' not in columns:
+        print(f"      Warning: 'DisplayText' column header not found in sheet '{sheet_name}'. Skipping specific alignment.")
+
+    def styled_cells(values, font=None):
+        cells = []
+        for value, alignment in zip(values, alignments):
+            cell = WriteOnlyCell(worksheet, value=value)
+            cell.alignment = alignment
+            if font is not None:
+                cell.font = font
+            cells.append(cell)
+        return cells
+
+    worksheet.append(styled_cells(columns, HEADER_FONT))
+    for row in group_df.itertuples(index=False):
+        worksheet.append(styled_cells(row))
+
+def xlsxwriter_formats(workbook):
+    """Creates the cell formats write_dialogue_sheet_xlsxwriter uses, once per workbook."""
+    center = {'align': 'center', 'valign': 'vcenter'}
+    left = {'align': 'left', 'valign': 'vcenter', 'text_wrap': True}
+    return {
+        "center": workbook.add_format(center),
+        "left": workbook.add_format(left),
+        "header_center": workbook.add_format({**center, 'bold': True}),
+        "header_left": workbook.add_format({**left, 'bold': True})
+    }
+
+def write_dialogue_sheet_xlsxwriter(workbook, sheet_name, group_df, formats):
+    """
+    Same layout as write_dialogue_sheet, for an xlsxwriter workbook in constant_memory mode
+    (rows must be written in order; each is flushed to disk once the next one starts).
+    formats comes from xlsxwriter_formats.
+    """
+    worksheet = workbook.add_worksheet(sheet_name)
+    columns = list(group_df.columns)
+
+    for col_index, width in enumerate(column_widths(group_df)):
+        worksheet.set_column(col_index, col_index, width)
+
+    # Freeze the first row
+    worksheet.freeze_panes(1, 0)
+
+    # DisplayText is left-aligned and wrapped, everything else centered (header row included)
+    cell_formats = [formats["left"] if column == 'DisplayText' else formats["center"] for column in columns]
+    header_formats = [formats["header_left"] if column == 'DisplayText' else formats["header_center"] for column in columns]
+    if 'DisplayText' not in columns:
+        print(f"      Warning: 'DisplayText' column header not found in sheet '{sheet_name}'. Skipping specific alignment.")
+
+    for col_index, column in enumerate(columns):
+        worksheet.write(0, col_index, column, header_formats[col_index])
+    for row_index, values in enumerate(group_df.itertuples(index=False), 1):
+        for col_index, value in enumerate(values):
+            # Missing values (NaN in category and numeric columns) are written as empty cells, like openpyxl
+            # does; xlsxwriter.write raises "NAN/INF not supported" for a NaN
+            if value is None or value != value:
+                worksheet.write_blank(row_index, col_index, None, cell_formats[col_index])
+            else:
+                worksheet.write(row_index, col_index, value, cell_formats[col_index])
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extracts localised dialogue from asset JSON files into an Excel workbook.")
+    parser.add_argument("--cache-dir", help="Cache each JSON file's extracted rows in this folder, so unchanged files are not parsed again on later runs")
+    parser.add_argument("--engine", choices=("openpyxl", "xlsxwriter"), default="openpyxl",
+                        help="Excel writer; xlsxwriter (if installed) is faster on large exports")
+    args = parser.parse_args()
+    if args.engine == "xlsxwriter" and not XLSXWRITER_AVAILABLE:
+        print("Warning: xlsxwriter not found (pip install xlsxwriter), using openpyxl instead.")
+        args.engine = "openpyxl"
+
     folder_path = input("Enter the path to the folder containing the JSON files: ")
 
     if not os.path.isdir(folder_path):
@@ -121,7 +417,7 @@ if __name__ == "__main__":
             print("No valid languages specified. Exiting.")
         else:
             print(f"Attempting to extract data for languages: {', '.join(desired_languages)}")
-            extracted_df = extract_dialogue_data(folder_path, desired_languages)
+            extracted_df = extract_dialogue_data(folder_path, desired_languages, cache_dir=args.cache_dir)
 
             if not extracted_df.empty:
                 # --- Auto Save to Excel with language prefix and grouped sheets ---
@@ -151,107 +447,37 @@ if __name__ == "__main__":
 
                 try:
                     print(f"\nSaving data to '{output_path}' grouped by SubSection and applying formatting...")
-                    # Create an Excel writer object
-                    # You need to have the openpyxl engine installed: pip install openpyxl
-                    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                        # Group the DataFrame by 'SubSection'
-                        # Sorting by SubSection makes the sheet order predictable
-                        extracted_df = extracted_df.sort_values(by='SubSection')
-                        grouped = extracted_df.groupby('SubSection')
-
-                        # Write each group to a different sheet
-                        for sub_section_name, group_df in grouped:
-                            # Create a valid sheet name from the SubSection name
-                            sheet_name = create_valid_sheet_name(sub_section_name)
-                            # Ensure sheet name is not empty after cleaning
-                            if not sheet_name:
-                                sheet_name = "Unnamed_Section"
-
-                            # Write the dataframe slice to the sheet
-                            try:
-                                group_df.to_excel(writer, sheet_name=sheet_name, index=False)
-
-                                # --- Apply Formatting to the Sheet ---
-                                worksheet = writer.sheets[sheet_name] # Get the openpyxl worksheet object
-
-                                # 1. Freeze the first row
-                                worksheet.freeze_panes = 'A2'
-
-                                # 2. Define Alignment styles
-                                center_aligned_text = Alignment(horizontal='center', vertical='center')
-                                left_aligned_text = Alignment(horizontal='left', vertical='center', wrap_text=True) # Added wrap_text
-
-                                # Find the column index for 'DisplayText' in this specific sheet's DataFrame
-                                try:
-                                     # Find the column index based on the header row text
-                                     header = [cell.value for cell in worksheet[1]]
-                                     display_text_col_idx = header.index('DisplayText') # Get 0-based index
-                                except ValueError:
-                                     # 'DisplayText' column not found in this sheet's header
-                                     print(f"      Warning: 'DisplayText' column header not found in sheet '{sheet_name}'. Skipping specific alignment.")
-                                     display_text_col_idx = -1 # Use -1 to indicate not found
-
-
-                                # Iterate over all rows and apply alignment based on column
-                                # Start from row 1 to include the header row for potential formatting
-                                # Use iter_rows(min_row=1) to ensure headers are included in alignment loop
-                                for row_index, row in enumerate(worksheet.iter_rows(min_row=1)):
-                                    for col_index, cell in enumerate(row):
-                                        if col_index == display_text_col_idx:
-                                            cell.alignment = left_aligned_text
-                                        else:
-                                            cell.alignment = center_aligned_text
-
-                                # 3. Autofit column width
-                                # Calculate max length for each column
-                                for col_idx_auto, col in enumerate(worksheet.columns):
-                                    max_length = 0
-                                    # Iterate through cells in the column
-                                    for cell in col:
-                                        try:
-                                            # Check length of cell content, handle None/empty
-                                            if cell.value is not None:
-                                                 # Use str() to handle numbers/other types, and account for newlines
-                                                 # Newlines make the cell taller, but don't affect width directly
-                                                 # We only care about the longest *line* or the total character count for width
-                                                 # Let's use the max length of any line within the cell or the total length
-                                                 cell_string = str(cell.value)
-                                                 current_max = max(len(line) for line in cell_string.split('\n')) if '\n' in cell_string else len(cell_string)
-                                                 max_length = max(max_length, current_max)
-                                            else:
-                                                 cell_length = 0
-                                            # Also consider header length for autofit
-                                            # The header is in the first row (row 1)
-                                            header_cell = worksheet.cell(row=1, column=col_idx_auto+1)
-                                            if header_cell.value is not None:
-                                                 max_length = max(max_length, len(str(header_cell.value)))
-
-
-                                        except Exception as cell_e: # Catch any potential errors in cell value or str conversion
-                                             # print(f"        Warning: Error getting length of cell in column {get_column_letter(col_idx_auto+1)}: {cell_e}") # Too noisy
-                                             pass # Just skip problematic cells for length calculation
-
-
-                                    # Apply width - rough estimate, might need tuning based on font/etc.
-                                    # Excel column width units are based on the width of the digit 0
-                                    # A common conversion is roughly char_length * 0.8 + 5 (for default font)
-                                    # Or simply (max_length + padding) * factor. Let's use max_length * ~0.9 + base padding.
-                                    adjusted_width = (max_length + 1) * 0.9 # Add padding, apply factor (tuned slightly)
-                                    # Set a minimum width to ensure columns aren't too narrow
-                                    min_width = 10 # Keep a reasonable minimum
-                                    final_width = max(adjusted_width, min_width)
-
-                                    # Set the width using the column letter
-                                    column_letter = get_column_letter(col_idx_auto + 1)
-                                    worksheet.column_dimensions[column_letter].width = final_width
-
-
-                                # --- End Formatting ---
-
-                            except Exception as sheet_e:
-                                print(f"      Error writing and formatting sheet '{sheet_name}' for SubSection '{sub_section_name}': {sheet_e}")
-
-
+                    # Both engines stream rows to disk as they are written instead of holding
+                    # a full cell model, and styles are set while each row is written
+                    if args.engine == "xlsxwriter":
+                        workbook = xlsxwriter.Workbook(output_path, {'constant_memory': True, 'strings_to_urls': False})
+                        # Formats are created once per workbook and shared by every sheet
+                        write_sheet = functools.partial(write_dialogue_sheet_xlsxwriter, formats=xlsxwriter_formats(workbook))
+                    else:
+                        workbook = openpyxl.Workbook(write_only=True)
+                        write_sheet = write_dialogue_sheet
+                    # Group the DataFrame by 'SubSection'
+                    # groupby sorts the group keys (a predictable sheet order) without re-sorting the whole
+                    # frame, and keeps each sheet's rows in file order
+                    grouped = extracted_df.groupby('SubSection', sort=True, observed=True)
+
+                    # Write each group to a different sheet
+                    for sub_section_name, group_df in grouped:
+                        # Create a valid sheet name from the SubSection name
+                        sheet_name = create_valid_sheet_name(sub_section_name)
+                        # Ensure sheet name is not empty after cleaning
+                        if not sheet_name:
+                            sheet_name = "Unnamed_Section"
+
+                        try:
+                            write_sheet(workbook, sheet_name, group_df)
+                        except Exception as sheet_e:
+                            print(f"      Error writing and formatting sheet '{sheet_name}' for SubSection '{sub_section_name}': {sheet_e}")
+
+                    if args.engine == "xlsxwriter":
+                        workbook.close()
+                    else:
+                        workbook.save(output_path)
                     print("Data successfully saved to Excel.")
                 except ImportError:
                      print("\nError: openpyxl not found. Please install it using 'pip install openpyxl' to export to Excel.")
@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import extract_dialogue
+
+
+def write_asset(folder, filename, values):
+    """Writes an asset export whose PSExternalMediaAsset holds one English entry per value dict."""
+    asset = {
+        "Type": "PSExternalMediaAsset",
+        "Properties": {"LocalisedDialogueData": [{"Key": "English", "Value": value} for value in values]}
+    }
+    with open(os.path.join(folder, filename), 'w', encoding='utf-8') as f:
+        json.dump([{"Type": "Other"}, asset], f)
+
+
+class NullValueExportTest(unittest.TestCase):
+    """A JSON null in a category column becomes NaN in the DataFrame; both engines must write it as an empty cell."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        folder = os.path.join(self.temp_dir.name, "json")
+        os.mkdir(folder)
+        write_asset(folder, "dialogue.json", [
+            {"DialogueKey": "K1", "Section": "S1", "SubSection": "Intro", "CharacterName": "Sam",
+             "SubtitleLines": [{"DisplayText": "Hello"}]},
+            {"DialogueKey": "K2", "Section": None, "SubSection": "Intro", "CharacterName": None,
+             "SubtitleLines": [{"DisplayText": "Who's there?"}]}
+        ])
+        self.extracted_df = extract_dialogue.extract_dialogue_data(folder, ["English"])
+
+    def read_rows(self, output_path):
+        workbook = openpyxl.load_workbook(output_path)
+        rows = [[cell.value for cell in row] for row in workbook["Intro"].iter_rows()]
+        header = rows[0]
+        return [dict(zip(header, row)) for row in rows[1:]]
+
+    def assert_null_cells_blank(self, rows):
+        self.assertEqual([row["DialogueKey"] for row in rows], ["K1", "K2"])
+        self.assertEqual((rows[0]["Section"], rows[0]["CharacterName"]), ("S1", "Sam"))
+        self.assertIsNone(rows[1]["Section"])
+        self.assertIsNone(rows[1]["CharacterName"])
+        self.assertEqual(rows[1]["DisplayText"], "Who's there?")
+
+    def test_category_columns_hold_nan(self):
+        self.assertEqual(self.extracted_df["CharacterName"].dtype, "category")
+        self.assertTrue(self.extracted_df["CharacterName"].isna().iloc[1])
+
+    def test_openpyxl_engine(self):
+        output_path = os.path.join(self.temp_dir.name, "openpyxl.xlsx")
+        workbook = openpyxl.Workbook(write_only=True)
+        extract_dialogue.write_dialogue_sheet(workbook, "Intro", self.extracted_df)
+        workbook.save(output_path)
+        self.assert_null_cells_blank(self.read_rows(output_path))
+
+    @unittest.skipUnless(extract_dialogue.XLSXWRITER_AVAILABLE, "xlsxwriter is not installed")
+    def test_xlsxwriter_engine(self):
+        output_path = os.path.join(self.temp_dir.name, "xlsxwriter.xlsx")
+        workbook = extract_dialogue.xlsxwriter.Workbook(output_path, {'constant_memory': True, 'strings_to_urls': False})
+        extract_dialogue.write_dialogue_sheet_xlsxwriter(workbook, "Intro", self.extracted_df,
+                                                         extract_dialogue.xlsxwriter_formats(workbook))
+        workbook.close()
+        self.assert_null_cells_blank(self.read_rows(output_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
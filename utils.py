@@ -1,19 +1,218 @@
 import os
+import sys
+import json
 import shutil
 import logging
-from tkinter import filedialog
+import threading
 
-def copy_file_with_logging(source_path, dest_path):
-    """Copies a file with basic logging, skipping extra checks."""
+# Attempt to import orjson (much faster JSON parsing/serialization); the standard json module is used otherwise
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    logging.debug("orjson library not found. Falling back to the standard json module.")
+    ORJSON_AVAILABLE = False
+
+# Buffer size for user-space copies; large transfers keep the disk streaming instead of stalling between reads and writes
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Bytes requested per os.copy_file_range call; the kernel copies as much as it can and the loop repeats until EOF
+COPY_RANGE_SIZE = 1 << 30
+
+# Linux ioctl request for a copy-on-write clone (btrfs/xfs reflink): the new file shares extents with the source
+FICLONE = 0x40049409
+
+_device_ids = {} # Directory -> st_dev, so each source/output directory is only stat'd once
+_reflink_unsupported_devices = set() # Devices where FICLONE already failed, to avoid retrying per file
+
+_copy_buffers = threading.local() # Per-thread view of a COPY_BUFFER_SIZE buffer, reused for every copy on that thread
+
+_created_directories = set() # Directories already created by ensure_directory
+_created_directories_lock = threading.Lock()
+
+def ensure_directory(directory):
+    """
+    Creates a directory (and parents) once; repeat calls for the same path skip the makedirs syscalls.
+    Parents are remembered too, so a sibling under a known parent is created with a single mkdir.
+    """
+    if directory in _created_directories:
+        return
+    with _created_directories_lock:
+        if directory not in _created_directories:
+            parent = os.path.dirname(directory)
+            if parent in _created_directories:
+                try:
+                    os.mkdir(directory) # Parent exists, skip makedirs' check of it
+                except FileExistsError:
+                    if not os.path.isdir(directory):
+                        raise
+            else:
+                os.makedirs(directory, exist_ok=True)
+                # Every ancestor exists now as well
+                while parent and parent not in _created_directories and parent != os.path.dirname(parent):
+                    _created_directories.add(parent)
+                    parent = os.path.dirname(parent)
+            _created_directories.add(directory)
+
+def clear_directory_cache():
+    """Forgets created directories, e.g. before a new batch in case output folders were deleted in between."""
+    with _created_directories_lock:
+        _created_directories.clear()
+
+def _device_id(directory):
+    device_id = _device_ids.get(directory)
+    if device_id is None:
+        device_id = os.stat(directory).st_dev
+        _device_ids[directory] = device_id
+    return device_id
+
+def _open_new_file(dest_path):
+    """Opens dest_path for binary writing, replacing rather than truncating an existing file (it may be a hard link to the source)."""
     try:
+        return open(dest_path, "xb")
+    except FileExistsError:
+        os.remove(dest_path)
+        return open(dest_path, "xb")
+
+def _copy_buffer():
+    """Returns this thread's copy buffer (as a memoryview), allocating it on first use."""
+    view = getattr(_copy_buffers, "view", None)
+    if view is None:
+        view = _copy_buffers.view = memoryview(bytearray(COPY_BUFFER_SIZE))
+    return view
+
+def _copy_file_contents(source_path, dest_path):
+    """
+    Copies the bytes of a file. Linux uses os.copy_file_range (in-kernel, server-side or reflinked where the
+    filesystem allows), falling back to shutil.copyfile's sendfile; macOS uses shutil's fcopyfile;
+    elsewhere (Windows) the data is moved in COPY_BUFFER_SIZE chunks rather than shutil's 1 MiB,
+    through a buffer each copy thread allocates once.
+    """
+    if sys.platform.startswith("linux") and hasattr(os, "copy_file_range"):
+        with open(source_path, "rb") as src, _open_new_file(dest_path) as dst:
+            try:
+                while os.copy_file_range(src.fileno(), dst.fileno(), COPY_RANGE_SIZE):
+                    pass
+                return
+            except OSError:
+                pass # e.g. EXDEV across filesystems on older kernels; shutil.copyfile below rewrites the new file
+    if sys.platform.startswith("linux") or sys.platform == "darwin":
+        # shutil.copyfile refuses a destination that is a hard link to the source, so replace it
+        try:
+            os.remove(dest_path)
+        except FileNotFoundError:
+            pass
         shutil.copyfile(source_path, dest_path)
-        logging.info(f"📦 Copied: {source_path} → {dest_path}")
+        return
+    view = _copy_buffer()
+    with open(source_path, "rb") as src, _open_new_file(dest_path) as dst:
+        while True:
+            bytes_read = src.readinto(view)
+            if not bytes_read:
+                break
+            dst.write(view[:bytes_read])
+
+def _try_reflink(source_path, dest_path, device_id):
+    """Attempts a zero-copy reflink clone on Linux. Returns False if unsupported."""
+    if not sys.platform.startswith("linux") or device_id in _reflink_unsupported_devices:
+        return False
+    import fcntl
+    with open(source_path, "rb") as src:
+        with _open_new_file(dest_path) as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return True
+            except OSError:
+                _reflink_unsupported_devices.add(device_id)
+                return False
+
+def _try_hardlink(source_path, dest_path):
+    """Attempts a hard link, replacing an existing destination. Returns False if linking is not possible."""
+    try:
+        os.link(source_path, dest_path)
+        return True
+    except FileExistsError:
+        if os.path.samefile(source_path, dest_path):
+            return True
+        os.remove(dest_path)
+        return _try_hardlink(source_path, dest_path)
+    except OSError:
+        return False
+
+def _is_same_file(source_path, dest_path):
+    """True if dest_path exists and is the same file as source_path (the same path, or a hard link to it)."""
+    try:
+        return os.path.samestat(os.stat(source_path), os.stat(dest_path))
+    except FileNotFoundError:
+        return False
+
+def _is_same_entry(source_path, dest_path):
+    """
+    True if dest_path names the same directory entry as source_path (same name in the same folder,
+    possibly reached through a symlink), rather than a separate hard link to the same file.
+    Replacing such a destination would delete the source.
+    """
+    return (os.path.normcase(os.path.basename(source_path)) == os.path.normcase(os.path.basename(dest_path))
+            and os.path.samefile(os.path.dirname(source_path) or ".", os.path.dirname(dest_path) or "."))
+
+def copy_file_with_logging(source_path, dest_path, allow_hardlink=False):
+    """
+    Copies a file with basic logging, skipping extra checks.
+    When source and destination are on the same filesystem, a copy-on-write reflink is tried first
+    (Linux btrfs/xfs), then a hard link if allow_hardlink is set; otherwise the bytes are copied.
+    A destination that is the source's own path is never replaced (it would delete the source's data);
+    one that is a hard link to the source (left by a run with hard links enabled) is kept when
+    allow_hardlink is set and otherwise replaced by a real copy.
+    """
+    try:
+        if _is_same_file(source_path, dest_path):
+            if _is_same_entry(source_path, dest_path):
+                raise shutil.SameFileError(f"{source_path!r} and {dest_path!r} are the same file")
+            if allow_hardlink:
+                # Hard link left by an earlier run with hard links enabled; nothing to do
+                logging.info(f"📦 Linked: {source_path} → {dest_path}")
+                return True
+        method = "Copied"
+        device_id = _device_id(os.path.dirname(source_path) or ".")
+        if device_id == _device_id(os.path.dirname(dest_path) or "."):
+            if _try_reflink(source_path, dest_path, device_id):
+                method = "Cloned"
+            elif allow_hardlink and _try_hardlink(source_path, dest_path):
+                method = "Linked"
+        if method == "Copied":
+            _copy_file_contents(source_path, dest_path)
+        logging.info(f"📦 {method}: {source_path} → {dest_path}")
         return True
     except Exception as e:
         logging.warning(f"⚠️ Failed to copy {source_path} → {dest_path}: {e}")
         return False
 
+def json_loads(data):
+    """Parses JSON from bytes (or str) with orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj, indent=False, sort_keys=False):
+    """Serializes obj to UTF-8 encoded JSON bytes, indented by 2 spaces and/or with sorted keys if requested."""
+    if ORJSON_AVAILABLE:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys, ensure_ascii=False).encode("utf-8")
+
+def load_json_file(path):
+    """Reads and parses a JSON file."""
+    with open(path, "rb") as f:
+        return json_loads(f.read())
+
+def dump_json_file(obj, path, sort_keys=False):
+    """Writes obj to a JSON file, indented by 2 spaces; sort_keys sorts every object's keys while serializing."""
+    with open(path, "wb") as f:
+        f.write(json_dumps(obj, indent=True, sort_keys=sort_keys))
+
 def select_directory(title, initialdir=None):
+    # Imported here so headless callers (and every worker process that imports utils) don't load Tk
+    from tkinter import filedialog
     return filedialog.askdirectory(title=title, initialdir=initialdir)
 
 def configure_logger(level=logging.INFO):